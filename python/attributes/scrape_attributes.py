@@ -8,38 +8,43 @@
 - get()メソッドで属性値を取得
 - data属性の抽出
 - 複数の属性を持つ要素の処理
+- 属性名の索引（common/doc_index.py）で文書を1回だけたどる
+- srcset・data-src（遅延読み込み）・<picture> から本当の画像を見つける（common/image_sources.py）
 """
 
-import requests
-from bs4 import BeautifulSoup
+import os
+import sys
+
+# python/ フォルダを検索パスに追加して共通モジュールを読み込む
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import http_client, image_sources
+from common.doc_index import get_index
 
 # スクレイピング対象のURL
 URL = "https://scraping-practice-six.vercel.app/attributes"
 
 def get_soup():
     """Webページを取得してBeautifulSoupオブジェクトを返す"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
     print("📡 Webページを取得中...")
-    response = requests.get(URL, headers=headers)
-    response.raise_for_status()  # エラーがあれば例外を発生
+    soup = http_client.get_soup(URL)
     print("✓ ページ取得成功")
-    return BeautifulSoup(response.content, 'html.parser')
+    return soup
 
 def scrape_basic_attributes(soup):
     """基本的なHTML属性を抽出する"""
     print("1. 基本的なHTML属性")
     print("-" * 30)
     
+    index = get_index(soup)
+
     # id属性を持つ要素を検索
-    elements_with_id = soup.find_all(attrs={'id': True})
+    elements_with_id = index.find_by_attr('id')
     print(f"id属性を持つ要素: {len(elements_with_id)}個")
     for element in elements_with_id[:5]:  # 最初の5個だけ表示
         print(f"  - {element.name}タグ: id='{element.get('id')}'")
     
     # class属性を持つ要素を検索
-    elements_with_class = soup.find_all(attrs={'class': True})
+    elements_with_class = index.find_by_attr('class')
     print(f"\nclass属性を持つ要素: {len(elements_with_class)}個")
     for element in elements_with_class[:5]:  # 最初の5個だけ表示
         classes = element.get('class', [])
@@ -51,7 +56,7 @@ def scrape_link_attributes(soup):
     print("2. リンク要素の属性")
     print("-" * 30)
     
-    links = soup.find_all('a')
+    links = get_index(soup).find_all('a')
     for i, link in enumerate(links, 1):
         href = link.get('href', 'なし')
         target = link.get('target', 'なし')
@@ -70,7 +75,7 @@ def scrape_image_attributes(soup):
     print("3. 画像要素の属性")
     print("-" * 30)
     
-    images = soup.find_all('img')
+    images = get_index(soup).find_all('img')
     for i, img in enumerate(images, 1):
         src = img.get('src', 'なし')
         alt = img.get('alt', 'なし')
@@ -78,12 +83,24 @@ def scrape_image_attributes(soup):
         height = img.get('height', 'なし')
         class_names = img.get('class', [])
         
+        # src 以外の候補（srcset・data-src・<picture>の<source>）もまとめて集める
+        candidates = image_sources.image_candidates(img, URL)
+        chosen = image_sources.choose_image(candidates)
+        
         print(f"画像{i}:")
         print(f"  src: {src}")
+        for attr in ('srcset',) + image_sources.LAZY_SRCSET_ATTRS + image_sources.LAZY_SRC_ATTRS:
+            if img.get(attr):
+                print(f"  {attr}: {img[attr]}")
         print(f"  alt: {alt}")
         print(f"  width: {width}")
         print(f"  height: {height}")
         print(f"  class: {' '.join(class_names) if class_names else 'なし'}")
+        print(f"  候補: {len(candidates)}個")
+        if chosen:
+            print(f"  使う画像: {chosen['url']} ({chosen['origin']})")
+        else:
+            print("  使う画像: なし（仮の画像だけ）")
         print()
 
 def scrape_data_attributes(soup):
@@ -91,15 +108,11 @@ def scrape_data_attributes(soup):
     print("4. data属性の抽出")
     print("-" * 30)
     
-    # data属性を持つ要素を検索
-    all_elements = soup.find_all()
+    # data-で始まる属性を持つ要素だけを索引から取り出す
     data_elements = []
-    
-    for element in all_elements:
-        # 全ての属性をチェックしてdata-で始まるものを探す
+    for element in get_index(soup).find_by_attr_prefix('data-'):
         data_attrs = {k: v for k, v in element.attrs.items() if k.startswith('data-')}
-        if data_attrs:
-            data_elements.append((element, data_attrs))
+        data_elements.append((element, data_attrs))
     
     print(f"data属性を持つ要素: {len(data_elements)}個")
     for element, data_attrs in data_elements[:10]:  # 最初の10個だけ表示
@@ -114,7 +127,7 @@ def scrape_form_attributes(soup):
     print("-" * 30)
     
     # input要素の属性を取得
-    inputs = soup.find_all('input')
+    inputs = get_index(soup).find_all('input')
     for i, input_elem in enumerate(inputs, 1):
         input_type = input_elem.get('type', 'なし')
         name = input_elem.get('name', 'なし')
@@ -134,7 +147,7 @@ def scrape_style_attributes(soup):
     print("-" * 30)
     
     # style属性を持つ要素を検索
-    styled_elements = soup.find_all(attrs={'style': True})
+    styled_elements = get_index(soup).find_by_attr('style')
     print(f"style属性を持つ要素: {len(styled_elements)}個")
     
     for i, element in enumerate(styled_elements[:5], 1):
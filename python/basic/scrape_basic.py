@@ -1,38 +1,39 @@
 """
 BeautifulSoupを使ったbasicページのスクレイピング例
 このスクリプトは練習用サイトの基本ページから様々な要素を抽出します。
+各関数は文書を1回だけたどって作った索引（common/doc_index.py）から要素を取り出します。
 """
 
-import requests
-from bs4 import BeautifulSoup
+import os
+import sys
+
+# python/ フォルダを検索パスに追加して共通モジュールを読み込む
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import http_client
+from common.doc_index import get_index
 
 URL = "https://scraping-practice-six.vercel.app/basic"
 
 def get_soup():
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
-    response = requests.get(URL, headers=headers)
-    response.raise_for_status()
-    return BeautifulSoup(response.content, 'html.parser')
+    return http_client.get_soup(URL)
 
 def scrape_main_title(soup):
     print("1. メインタイトル:")
-    main_title = soup.find('h1', id='main-title')
+    main_title = get_index(soup).find('h1', id='main-title')
     if main_title:
         print(f"   {main_title.get_text(strip=True)}")
     print()
 
 def scrape_headings(soup):
     print("2. 見出し要素 (h1-h6):")
-    headings = soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+    headings = get_index(soup).find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
     for heading in headings:
         print(f"   {heading.name}: {heading.get_text(strip=True)}")
     print()
 
 def scrape_paragraphs(soup):
     print("3. 段落要素:")
-    paragraphs = soup.find_all('p')
+    paragraphs = get_index(soup).find_all('p')
     for i, p in enumerate(paragraphs):
         text = p.get_text(strip=True)
         if len(text) > 50:
@@ -42,7 +43,7 @@ def scrape_paragraphs(soup):
 
 def scrape_links(soup):
     print("4. リンク要素:")
-    links = soup.find_all('a')
+    links = get_index(soup).find_all('a')
     for i, link in enumerate(links, 1):
         href = link.get('href', 'なし')
         text = link.get_text(strip=True)
@@ -51,7 +52,7 @@ def scrape_links(soup):
 
 def scrape_images(soup):
     print("5. 画像要素:")
-    images = soup.find_all('img')
+    images = get_index(soup).find_all('img')
     for i, img in enumerate(images, 1):
         src = img.get('src', 'なし')
         alt = img.get('alt', 'なし')
@@ -60,7 +61,7 @@ def scrape_images(soup):
 
 def scrape_sections(soup):
     print("6. セクション別情報:")
-    sections = soup.find_all('section')
+    sections = get_index(soup).find_all('section')
     for i, section in enumerate(sections, 1):
         section_title = section.find('h2')
         if section_title:
@@ -70,15 +71,16 @@ def scrape_sections(soup):
 
 def scrape_white_sections(soup):
     print("7. 特定のクラス要素:")
-    white_sections = soup.find_all(class_='bg-white')
+    white_sections = get_index(soup).find_by_class('bg-white')
     print(f"   'bg-white'クラスの要素数: {len(white_sections)}")
     print()
 
 def scrape_decorative(soup):
     print("9. テキスト装飾要素:")
     decorative_tags = ['strong', 'em', 'u', 's', 'mark', 'sup', 'sub', 'code']
+    index = get_index(soup)
     for tag in decorative_tags:
-        elements = soup.find_all(tag)
+        elements = index.find_all(tag)
         if elements:
             print(f"   {tag}: {len(elements)}個")
             for element in elements:
@@ -3,66 +3,89 @@
 """
 【初心者向け】画像スクレイピングの基本
 このスクリプトは以下のことを行います：
-1. Webページから全ての画像URLを取得
+1. Webページから全ての画像URLを取得（src・srcset・data-src・<picture>の候補から選ぶ）
 2. 画像URLをCSVファイルに保存
 3. 画像をローカルフォルダにダウンロード
+   （--probe を付けると、ダウンロードせずに先頭数KBだけ読んで形式と幅・高さを調べる）
 """
 
-import requests
-from bs4 import BeautifulSoup
-import csv
+import argparse
 import os
-from urllib.parse import urljoin
+import sys
+from urllib.parse import urlsplit
 
-def scrape_images():
-    """画像を取得してCSVに保存、ローカルにダウンロードする"""
+# python/ フォルダを検索パスに追加して共通モジュールを読み込む
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import http_client, image_downloader, image_probe, image_sources, image_store, parser, sinks
+
+def image_filename(number, url):
+    """画像の保存名を作る（拡張子はURLから。画像の拡張子でなければ .jpg）"""
+    extension = os.path.splitext(urlsplit(url).path)[1].lower()
+    if extension == '.jpeg':
+        extension = '.jpg'
+    if extension not in image_probe.EXTENSIONS.values():
+        extension = '.jpg'
+    return f"image_{number}{extension}"
+
+def probe_images_to_file(items, output_folder, workers):
+    """
+    画像をダウンロードせず、先頭数KBだけ読んで形式と幅・高さを保存する
+
+    items: (画像URL, ファイル名) のリスト
+    """
+    probe_filename = sinks.output_path(output_folder, "image_probe")
+    fieldnames = ['番号', '画像URL', '形式', '幅', '高さ', 'ファイルサイズ', '読んだバイト数', 'ファイル名']
+    read_bytes = 0
+    failed = 0
+    with sinks.open_sink(probe_filename, fieldnames, key='画像URL') as sink:
+        results = image_probe.probe_images((url for url, _ in items), window=workers)
+        for i, ((url, result, error), (_, filename)) in enumerate(zip(results, items), 1):
+            if error is not None:
+                failed += 1
+                print(f"  ✗ 調べられませんでした: {url} - {error}")
+                continue
+            read_bytes += result['読んだバイト数']
+            # 本当の形式が分かれば、ファイル名の拡張子もそれに合わせる
+            if result['拡張子']:
+                filename = os.path.splitext(filename)[0] + result['拡張子']
+            print(f"  {i}. {result['形式'] or '不明'} {result['幅']}x{result['高さ']} - {url}")
+            sink.write({'番号': i, '画像URL': url, 'ファイル名': filename, **result})
+    print(f"✓ 画像情報を保存しました: {probe_filename}")
+    print(f"  成功: {len(items) - failed}件 / 失敗: {failed}件 / 読んだ合計: {read_bytes:,} bytes")
+    return probe_filename
+
+def scrape_images(workers=image_downloader.DEFAULT_WORKERS, probe=False,
+                  target_width=None, formats=None):
+    """
+    画像を取得してCSVに保存、ローカルにダウンロードする
+
+    workers: 同時にダウンロード（probe=Trueなら調査）する画像の数
+    probe: Trueならダウンロードせず、形式と幅・高さだけを調べて保存する
+    target_width: 画像の目標の幅。srcsetなどに複数の大きさがあれば、これ以上で一番小さいものを選ぶ
+                  （Noneなら元の src。遅延読み込みで src が仮の画像なら data-src など）
+    formats: 形式の優先順（['webp', 'jpeg'] など）
+    """
     
     # スクレイピング対象のURL
     URL = "https://scraping-practice-six.vercel.app/basic"
     
     # 1. Webページを取得
     try:
-        response = requests.get(URL)
-        response.raise_for_status()  # エラーがあれば例外を発生
+        response = http_client.fetch_page(URL)  # エラーがあれば例外を発生
         print("✓ ページ取得成功")
     except Exception as e:
         print(f"✗ ページ取得失敗: {e}")
         return
     
     # 2. BeautifulSoupでHTMLを解析
-    soup = BeautifulSoup(response.content, 'html.parser')
+    soup = parser.make_soup(response.content)
     print("✓ HTML解析完了")
     
     # 3. 全ての画像タグを検索
     images = soup.find_all('img')
     print(f"✓ {len(images)}個の画像を発見")
     
-    # 4. 画像情報をリストに保存
-    image_list = []
-    for i, img in enumerate(images, 1):
-        # src属性（画像のURL）を取得
-        src = img.get('src')
-        if src:
-            # 相対URLを絶対URLに変換
-            # src = "/sample1.jpeg"
-            # URL = "https://scraping-practice-six.vercel.app/basic"
-            # full_urlの中身はhttps://scraping-practice-six.vercel.app/basic/image1.jpgのようになります
-            full_url = urljoin(URL, src)
-
-            
-            # 画像のファイル名を生成
-            filename = f"image_{i}.jpg"
-            
-            # リストに追加
-            image_data = {
-                '番号': i,
-                '画像URL': full_url,
-                'ファイル名': filename
-            }
-            image_list.append(image_data)
-            
-    
-    # 5. CSVファイルに保存
+    # 4. CSVファイルに保存
     print("\n4. CSVファイルに保存中...")
     
     # output フォルダを作成
@@ -71,30 +94,55 @@ def scrape_images():
         os.makedirs(output_folder)
         print(f"✓ フォルダ作成: {output_folder}")
     
-    csv_filename = os.path.join(output_folder, "images.csv")
+    csv_filename = sinks.output_path(output_folder, "images")
     # csv_filenameの中身は"output/images.csv"になります
+    # （SCRAPE_OUTPUT_FORMAT=jsonl なら "output/images.jsonl"）
+    
+    # ダウンロードする (画像URL, ファイル名) の一覧
+    items = []
     try:
-        # CSVファイルを書き込みモードで開く
-        with open(csv_filename, 'w', newline='', encoding='utf-8') as csvfile:
-            # CSVの列名を定義
-            # csv.DictWriter は辞書のキーと fieldnames を照合してCSVの列に書き込むためのです。
-            # image_dataのキーとfieldnamesが一致している必要があります。
-            fieldnames = ['番号', '画像URL', 'ファイル名']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            # ヘッダー行を書き込み
-            writer.writeheader()
-            
-            # データ行を書き込み
-            for image_data in image_list:
-                writer.writerow(image_data)
+        # CSVの列名を定義
+        # 辞書のキーと列名を照合してCSVの列に書き込みます。
+        # image_dataのキーとfieldnamesが一致している必要があります。
+        fieldnames = ['番号', '画像URL', 'ファイル名', '取得元', '幅']
+        # 画像を見つけたそばから1件ずつ書き込む（全件をリストにためない）
+        # （SQLiteに保存する場合は、画像URLが同じ行を更新する）
+        with sinks.open_sink(csv_filename, fieldnames, key='画像URL') as sink:
+            for i, img in enumerate(images, 1):
+                # src だけでなく srcset・data-src・<picture>の<source> からも候補を集め、
+                # 目標の幅と形式に合う画像を1つ選ぶ（候補のURLは絶対URLになっている）
+                # src = "/sample1.jpeg"
+                # URL = "https://scraping-practice-six.vercel.app/basic"
+                # candidate['url']の中身はhttps://scraping-practice-six.vercel.app/sample1.jpegのようになります
+                candidate = image_sources.resolve_image(img, URL, target_width, formats)
+                if candidate:
+                    full_url = candidate['url']
+                    
+                    # 画像のファイル名を生成（拡張子はURLから決める）
+                    filename = image_filename(i, full_url)
+                    
+                    image_data = {
+                        '番号': i,
+                        '画像URL': full_url,
+                        'ファイル名': filename,
+                        '取得元': candidate['origin'],
+                        '幅': candidate['width'],
+                    }
+                    sink.write(image_data)
+                    items.append((full_url, filename))
         
         print(f"✓ CSVファイル保存完了: {csv_filename}")
     except Exception as e:
         print(f"✗ CSV保存失敗: {e}")
         return
     
-    # 6. 画像ダウンロード用フォルダを作成
+    # 調査モードでは本体をダウンロードしない
+    if probe:
+        print("\n5. 画像の形式とサイズを調べています（先頭数KBだけ読み込み）...")
+        probe_images_to_file(items, output_folder, workers)
+        return
+    
+    # 5. 画像ダウンロード用フォルダを作成
     print("\n5. 画像をダウンロード中...")
     download_folder = os.path.join(output_folder, "downloaded_images")
     
@@ -103,24 +151,19 @@ def scrape_images():
         os.makedirs(download_folder)
         print(f"✓ フォルダ作成: {download_folder}")
     
-    # 7. 各画像をダウンロード
-    for image_data in image_list:
-        try:
-            # 画像URLからデータを取得
-            img_response = requests.get(image_data['画像URL'])
-            
-            # ファイルパスを作成
-            file_path = os.path.join(download_folder, image_data['ファイル名'])
-            
-            # 画像ファイルを保存
-            with open(file_path, 'wb') as f:
-                f.write(img_response.content)
-            
-        except Exception as e:
-            print(f"  ✗ ダウンロード失敗: {image_data['ファイル名']} - {e}")
+    # 6. 各画像を並列でダウンロード
+    # 本体は少しずつファイルに書き込むので、大きな画像でもメモリを圧迫しません
+    # 前回途中で止まっていれば、取得済みの画像は飛ばし、途中の画像は続きから受け取ります
+    # （状態は downloaded_images/.manifest.jsonl に記録されます）
+    # 画像の実体は output/.store/images に中身ごとに1つだけ保存し、
+    # downloaded_images/ にはそのハードリンクを置きます（同じ画像が何度出てきても実体は1つ）
+    with image_store.ImageStore() as store:
+        image_downloader.download_images(items, download_folder, workers=workers, store=store)
+        count, total = store.summary()
     print(f"✓ 画像ファイル保存完了")
+    print(f"  ストア: {count}種類の画像 ({total:,} bytes)")
     
-    # 8. 結果を表示
+    # 7. 結果を表示
     print("\n" + "=" * 50)
     print("画像スクレイピング完了")
     print("=" * 50)
@@ -129,5 +172,22 @@ def scrape_images():
     print("=" * 50)
 
 if __name__ == "__main__":
+    # 同時ダウンロード数はコマンドラインで変更できます
+    # 例: python basic/scrape_images.py --workers 16
+    # 形式とサイズだけを調べる: python basic/scrape_images.py --probe
+    # サムネイル用に小さい画像を選ぶ: python basic/scrape_images.py --target-width 320 --formats webp,jpeg
+    arg_parser = argparse.ArgumentParser(description="画像スクレイピング")
+    arg_parser.add_argument('--workers', type=int, default=image_downloader.DEFAULT_WORKERS,
+                            help="同時にダウンロードする画像の数")
+    arg_parser.add_argument('--probe', action='store_true',
+                            help="ダウンロードせず、画像の形式と幅・高さだけを調べる")
+    arg_parser.add_argument('--target-width', type=int,
+                            help="srcsetなどの候補から、この幅以上で一番小さい画像を選ぶ")
+    arg_parser.add_argument('--formats',
+                            help="形式の優先順（カンマ区切り。例: webp,jpeg）")
+    args = arg_parser.parse_args()
+
     # プログラム実行時にscrape_images関数を呼び出し
-    scrape_images()
\ No newline at end of file
+    formats = [name.strip().lower() for name in args.formats.split(',')] if args.formats else None
+    scrape_images(workers=args.workers, probe=args.probe,
+                  target_width=args.target_width, formats=formats)
\ No newline at end of file
@@ -0,0 +1,4 @@
+"""
+スクレイパー共通モジュール
+各スクリプトから共有して使う取得・解析の仕組みをまとめています。
+"""
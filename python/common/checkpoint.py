@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+フェーズごとのチェックポイント
+時間のかかる処理をいくつかのフェーズに分け、フェーズが終わるたびに結果を
+JSON Lines（1行に1件）のファイルに保存します。
+途中で止まっても、再実行すると終わったフェーズは保存した結果を読み込んで飛ばせます。
+
+結果は <フェーズ名>.jsonl.tmp に書いてから <フェーズ名>.jsonl に名前を変える（os.replace）ので、
+<フェーズ名>.jsonl があれば、そのフェーズは最後まで終わっています。
+書き込みの途中で止まっても、残るのは .tmp のファイルだけです。
+
+学習ポイント:
+- 一時ファイルに書いてから名前を変えると、中途半端なファイルが残らない
+- 「ファイルがあるか」をそのまま「終わったか」の目印（チェックポイント）に使える
+- JSON Linesは1行ずつ読めるので、件数が多くても読み込みが軽い
+
+使い方:
+    checkpoint = PhaseCheckpoint('output/dynamic')
+    if checkpoint.is_done('news'):
+        news_data = checkpoint.load('news')      # 前回の結果を使う
+    else:
+        news_data = scrape_async_news(driver)
+        checkpoint.save('news', news_data)
+    ...
+    checkpoint.clear()                           # 全部終わったら消す（次回は最初から）
+"""
+
+import json
+import os
+
+from common import sinks
+
+SUFFIX = '.jsonl'
+TMP_SUFFIX = '.tmp'
+
+
+class PhaseCheckpoint:
+    """フェーズごとの結果を folder に保存・読み込みする"""
+
+    def __init__(self, folder):
+        self.folder = folder
+
+    def path(self, name):
+        """フェーズの結果ファイルのパス"""
+        return os.path.join(self.folder, name + SUFFIX)
+
+    def is_done(self, name):
+        """フェーズが最後まで終わって保存されているかを返す"""
+        return os.path.exists(self.path(name))
+
+    def load(self, name):
+        """保存したフェーズの結果（レコードのリスト）を読み込む"""
+        with open(self.path(name), 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def save(self, name, records):
+        """レコードを一時ファイルに1件ずつ書き、書き終わったら名前を変えて完了にする"""
+        path = self.path(name)
+        tmp_path = path + TMP_SUFFIX
+        with sinks.JsonLinesSink(tmp_path) as sink:
+            sink.write_many(records)
+        os.replace(tmp_path, path)
+        return path
+
+    def clear(self):
+        """保存したフェーズの結果（と書きかけの一時ファイル）をすべて消す"""
+        if not os.path.isdir(self.folder):
+            return
+        for filename in os.listdir(self.folder):
+            if filename.endswith((SUFFIX, SUFFIX + TMP_SUFFIX)):
+                os.remove(os.path.join(self.folder, filename))
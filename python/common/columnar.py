@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列形式（カラム型）のテーブル
+スクレイピングした行を、列ごとに型をそろえた配列として持ちます。
+"¥1,200" のような価格は取り込むときに一度だけ数値に変換するので、
+集計のたびに文字列を解析し直す必要がありません。
+
+学習ポイント:
+- 行のリストではなく、列ごとに同じ型の値をまとめて持つ（列指向）
+- array.array は数値を詰めて保存するので、intオブジェクトのリストよりずっと小さい
+- 同じ文字列が何度も出る列は「文字列の辞書＋番号の配列」で持つ（辞書エンコーディング）
+- sum()/min()/max() に array を渡すと、ループはC言語側で回る
+
+使い方:
+    table = ColumnTable(['日付', '商品', '数量', '売上'])
+    table.append(['2024-01-01', 'Apple', '2', '¥2,400'])
+    table.sum('売上')
+    table.group_sum('商品', '売上')
+"""
+
+import array
+import datetime
+import re
+import sys
+from collections import Counter, defaultdict
+
+# 数値にするときに取り除く記号（通貨記号・桁区切り・空白）
+_NUMBER_NOISE = re.compile(r'[¥￥$円,\s]')
+_INT_PATTERN = re.compile(r'[+-]?\d+')
+_FLOAT_PATTERN = re.compile(r'[+-]?(\d+\.\d*|\.\d+)')
+# 2024-01-01 / 2024/1/1 形式の日付
+_DATE_PATTERN = re.compile(r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})')
+
+
+def parse_number(text):
+    """'¥1,200' のような文字列を数値にする（数値でなければNone）"""
+    cleaned = _NUMBER_NOISE.sub('', text)
+    if _INT_PATTERN.fullmatch(cleaned):
+        return int(cleaned)
+    if _FLOAT_PATTERN.fullmatch(cleaned):
+        return float(cleaned)
+    return None
+
+
+def parse_date(text):
+    """'2024-01-01' のような文字列を日付にする（日付でなければNone）"""
+    match = _DATE_PATTERN.fullmatch(text.strip())
+    if not match:
+        return None
+    try:
+        return datetime.date(*map(int, match.groups()))
+    except ValueError:
+        return None
+
+
+class NumberColumn:
+    """数値の列（整数はarray('q')、小数が出てきたらarray('d')に切り替える）"""
+
+    kind = '数値'
+
+    def __init__(self):
+        self.values = array.array('q')
+
+    def append(self, text):
+        """値を追加する（数値として読めなければFalseを返す）"""
+        value = parse_number(text)
+        if value is None:
+            return False
+        if isinstance(value, float) and self.values.typecode == 'q':
+            self.values = array.array('d', self.values)
+        try:
+            self.values.append(value)
+        except OverflowError:
+            return False
+        return True
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        return self.values[i]
+
+    def texts(self):
+        return [str(value) for value in self.values]
+
+    def min(self):
+        return min(self.values) if self.values else None
+
+    def max(self):
+        return max(self.values) if self.values else None
+
+
+class DateColumn:
+    """日付の列（日付を通し番号にしてarray('i')に持つ）"""
+
+    kind = '日付'
+
+    def __init__(self):
+        self.values = array.array('i')
+
+    def append(self, text):
+        """値を追加する（日付として読めなければFalseを返す）"""
+        value = parse_date(text)
+        if value is None:
+            return False
+        self.values.append(value.toordinal())
+        return True
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        return datetime.date.fromordinal(self.values[i])
+
+    def texts(self):
+        return [datetime.date.fromordinal(value).isoformat() for value in self.values]
+
+    def min(self):
+        return datetime.date.fromordinal(min(self.values)) if self.values else None
+
+    def max(self):
+        return datetime.date.fromordinal(max(self.values)) if self.values else None
+
+
+class StringColumn:
+    """文字列の列（種類ごとに1つだけ保存し、各行は番号で持つ）"""
+
+    kind = '文字列'
+
+    def __init__(self):
+        self.codes = array.array('I')
+        self.dictionary = []   # 番号 → 文字列
+        self._lookup = {}      # 文字列 → 番号
+
+    def append(self, text):
+        code = self._lookup.get(text)
+        if code is None:
+            code = len(self.dictionary)
+            self.dictionary.append(sys.intern(text))
+            self._lookup[text] = code
+        self.codes.append(code)
+        return True
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        return self.dictionary[self.codes[i]]
+
+    def texts(self):
+        return [self.dictionary[code] for code in self.codes]
+
+    def min(self):
+        return min(self.dictionary) if self.dictionary else None
+
+    def max(self):
+        return max(self.dictionary) if self.dictionary else None
+
+
+def new_column(text):
+    """最初の値から列の型を決める（日付 → 数値 → 文字列の順に試す）"""
+    if parse_date(text) is not None:
+        return DateColumn()
+    if parse_number(text) is not None:
+        return NumberColumn()
+    return StringColumn()
+
+
+class ColumnTable:
+    """
+    列ごとに型をそろえて持つテーブル
+
+    列の型は最初の行の値で決まります。途中で型に合わない値が出てきた列は
+    文字列の列に切り替えます（それまでの値は変換後の表記で保存し直す）。
+    """
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.columns = [None] * len(self.names)
+        self.row_count = 0
+
+    def append(self, row):
+        """1行分のセルの文字列を追加する（足りないセルは空文字として扱う）"""
+        for i in range(len(self.names)):
+            text = row[i] if i < len(row) else ''
+            column = self.columns[i]
+            if column is None:
+                column = self.columns[i] = new_column(text)
+            if not column.append(text):
+                column = self.columns[i] = _to_string_column(column)
+                column.append(text)
+        self.row_count += 1
+
+    def column(self, name):
+        """列名から列を返す"""
+        if name not in self.names:
+            raise KeyError(f"列がありません: {name}")
+        column = self.columns[self.names.index(name)]
+        return column if column is not None else StringColumn()
+
+    def _numbers(self, name):
+        column = self.column(name)
+        if not isinstance(column, NumberColumn):
+            raise TypeError(f"数値の列ではありません: {name}")
+        return column.values
+
+    def sum(self, name):
+        """数値の列の合計を返す"""
+        return sum(self._numbers(name))
+
+    def min(self, name):
+        """列の最小値を返す（空ならNone）"""
+        return self.column(name).min()
+
+    def max(self, name):
+        """列の最大値を返す（空ならNone）"""
+        return self.column(name).max()
+
+    def group_sum(self, key, value):
+        """keyの列の値ごとに、valueの列の合計を {キー: 合計} で返す"""
+        keys = self.column(key)
+        values = self._numbers(value)
+        if isinstance(keys, StringColumn):
+            # 文字列の番号をそのまま添字にして足し込む
+            totals = [0] * len(keys.dictionary)
+            for code, amount in zip(keys.codes, values):
+                totals[code] += amount
+            return dict(zip(keys.dictionary, totals))
+        totals = defaultdict(int)
+        for i, amount in enumerate(values):
+            totals[keys[i]] += amount
+        return dict(totals)
+
+    def group_count(self, key):
+        """keyの列の値ごとの行数を {キー: 行数} で返す"""
+        keys = self.column(key)
+        if isinstance(keys, StringColumn):
+            counts = Counter(keys.codes)
+            return {text: counts[code] for code, text in enumerate(keys.dictionary)}
+        return dict(Counter(keys[i] for i in range(len(keys))))
+
+
+def _to_string_column(column):
+    """型に合わない値が出てきた列を文字列の列に作り直す"""
+    string_column = StringColumn()
+    for text in column.texts():
+        string_column.append(text)
+    return string_column
+
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+順番を保った同時実行
+たくさんの項目に同じ処理を決まった数ずつ同時に実行し、結果を元の順番で返します。
+ページの取得や画像の調査など、待ち時間の長い処理をまとめて速くするのに使います。
+
+学習ポイント:
+- ThreadPoolExecutor で、通信の待ち時間の間にほかの処理を進める
+- 同時に実行するのは最大window件まで。先に終わった項目は前の項目を待つ
+  （手元にたまる結果はwindow件までなのでメモリが増え続けない）
+- 例外は呼び出し側に投げずに結果と一緒に返すので、1件の失敗で全体が止まらない
+
+使い方:
+    for url, result, error in map_in_order(read_page, urls, window=8):
+        ...
+"""
+
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# 既定の同時実行数
+DEFAULT_WINDOW = 8
+
+
+def map_in_order(func, items, window=DEFAULT_WINDOW):
+    """
+    itemsのそれぞれにfuncを最大window件ずつ同時に実行し、
+    (item, 結果, 例外) を元の順番で返すジェネレーター
+
+    itemsは終わりのないジェネレーターでもよい（呼び出し側がループを抜ければ止まる）
+    """
+    items = iter(items)
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=window)
+    try:
+        for item in itertools.islice(items, window):
+            pending.append((item, executor.submit(func, item)))
+        while pending:
+            item, future = pending.popleft()
+            try:
+                result, error = future.result(), None
+            except Exception as e:
+                result, error = None, e
+            # 1件受け取ったら次の1件を始めて、同時実行数を保つ
+            for next_item in itertools.islice(items, 1):
+                pending.append((next_item, executor.submit(func, next_item)))
+            yield item, result, error
+    finally:
+        # 途中で止めた場合、まだ始まっていない処理は取り消す
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+差分スクレイピング（前回から変わったレコードだけを出力する）
+前回の実行で見たレコードを「ID → 内容のハッシュ値」として保存しておき、
+今回のレコードと比べて 追加・更新・削除 に分けます。
+
+保存するのはレコード本体ではなく8バイトのハッシュ値だけなので、
+件数が多くても前回の状態のファイルは小さく済みます。
+
+学習ポイント:
+- ハッシュ値（hashlib.blake2b）で「内容が同じか」を短い値で比べられる
+- 辞書の中身をJSONにするとき sort_keys=True にすれば、キーの順番に関係なく同じ文字列になる
+- 状態ファイルは一時ファイルに書いてから置き換える（途中で止まっても壊れない）
+
+使い方:
+    tracker = DeltaTracker('products', key='商品名')
+    for record in records:
+        change, key = tracker.check(record)   # '追加' / '更新' / None（変化なし）
+    deleted = tracker.deleted_keys()          # 今回見つからなかったID
+    tracker.save()                            # 今回の状態を次回のために保存
+
+    # 上の流れをまとめて行い、変化のあったレコードだけを出力先に書く
+    counts = write_changes(tracker, records, sink, change_log)
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from common import sinks
+from common.fileutil import write_atomic
+
+# 前回の状態を保存するフォルダ
+STATE_DIR = os.path.join('output', '.state')
+
+# 全出力の変更を追記していく変更ログ
+CHANGE_LOG = os.path.join('output', 'changes.jsonl')
+
+INSERTED = '追加'
+UPDATED = '更新'
+DELETED = '削除'
+
+# ハッシュ値の長さ（バイト）
+DIGEST_SIZE = 8
+
+
+def record_digest(record):
+    """レコードの内容からハッシュ値（16文字の16進数）を作る"""
+    data = json.dumps(record, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=DIGEST_SIZE).hexdigest()
+
+
+class DeltaTracker:
+    """
+    前回の実行との差分を調べる
+
+    name: 状態ファイルの名前（出力ごとに別の名前にする）
+    key: レコードのIDになる列名。Noneならレコードの内容そのものをIDにする
+         （その場合「更新」はなく、追加と削除だけになる）
+    """
+
+    def __init__(self, name, key=None, state_dir=STATE_DIR):
+        self.name = name
+        self.key = key
+        self.path = os.path.join(state_dir, f"{name}.hashes.json")
+        self.previous = self._load()
+        self.current = {}
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def check(self, record):
+        """
+        レコードを記録し、(変更の種類, ID) を返す
+
+        変更の種類は '追加' / '更新' / None（前回と同じ）
+        """
+        digest = record_digest(record)
+        key = digest if self.key is None else str(record.get(self.key))
+        self.current[key] = digest
+        previous = self.previous.get(key)
+        if previous is None:
+            return INSERTED, key
+        if previous != digest:
+            return UPDATED, key
+        return None, key
+
+    def deleted_keys(self):
+        """前回はあって今回はなかったIDを返す"""
+        return [key for key in self.previous if key not in self.current]
+
+    def save(self):
+        """今回の状態を保存する（次回の比較に使う）"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        data = json.dumps(self.current, ensure_ascii=False, separators=(',', ':'))
+        write_atomic(self.path, data.encode('utf-8'))
+
+
+def write_changes(tracker, records, sink, change_log=None):
+    """
+    records を前回と比べ、追加・更新・削除されたレコードだけを sink に書く
+
+    sink の各行には '変更' の列が付く。削除されたレコードは本体を保存していないので、
+    IDの列だけを書く（keyがNoneなら全行に 'ハッシュ' の列を付け、それで対応を取る）。
+    change_log を渡すと、実行日時と変更の一覧も追記する。
+    戻り値: {変更の種類: 件数}
+    """
+    counts = {INSERTED: 0, UPDATED: 0, DELETED: 0}
+    run_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    key_name = tracker.key or 'ハッシュ'
+
+    def log(change, key):
+        counts[change] += 1
+        if change_log is not None:
+            change_log.write({'実行日時': run_at, '出力': tracker.name, '変更': change, 'キー': key})
+
+    for record in records:
+        change, key = tracker.check(record)
+        if change is not None:
+            if tracker.key is None:
+                record = {**record, key_name: key}
+            sink.write({'変更': change, **record})
+            log(change, key)
+    for key in tracker.deleted_keys():
+        sink.write({'変更': DELETED, key_name: key})
+        log(DELETED, key)
+    tracker.save()
+    return counts
+
+
+def open_change_log(path=CHANGE_LOG):
+    """変更ログ（JSON Lines）を追記モードで開く"""
+    return sinks.open_sink(path, append=True)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文書の要素インデックス
+文書を1回だけたどって、タグ名・クラス名・id・属性名から要素を引ける索引を作ります。
+同じ文書に何度も find_all() をする代わりに、この索引に問い合わせます。
+
+学習ポイント:
+- find_all()は呼ぶたびに文書全体をたどる
+- 先に辞書（タグ名 → 要素のリスト）を作っておけば、検索は辞書を引くだけになる
+- 要素の順番（文書内の位置）を覚えておけば、複数タグの結果も文書順に並べられる
+- 属性名やクラス名を並べ替えておけば、二分探索で「data-で始まる属性」などをまとめて探せる
+
+使い方:
+    index = get_index(soup)
+    index.find_all(['h1', 'h2'])
+    index.find_by_class('bg-white')
+    index.find_by_attr_prefix('data-')
+    index.find_by_classes(['menu', 'nav'], tags=['ul', 'ol'], prefix=True)
+"""
+
+import bisect
+import heapq
+from collections import defaultdict
+
+
+class DocumentIndex:
+    """1回の走査で作るタグ名・クラス名・id・属性名の索引"""
+
+    def __init__(self, soup):
+        self.position = {}
+        self.by_tag = defaultdict(list)
+        self.by_class = defaultdict(list)
+        self.by_id = defaultdict(list)
+        self.by_attr = defaultdict(list)
+
+        # 文書全体を1回だけたどる
+        for i, element in enumerate(soup.find_all(True)):
+            self.position[id(element)] = i
+            self.by_tag[element.name].append(element)
+            for class_name in element.get('class', []):
+                self.by_class[class_name].append(element)
+            element_id = element.get('id')
+            if element_id:
+                self.by_id[element_id].append(element)
+            for attr_name in element.attrs:
+                self.by_attr[attr_name].append(element)
+
+        # 前方一致検索用に属性名とクラス名を並べ替えておく
+        self.attr_names = sorted(self.by_attr)
+        self.class_names = sorted(self.by_class)
+
+    def _merge(self, lists):
+        """文書順に並んだ複数のリストを、文書順のまま1つにまとめる"""
+        return list(heapq.merge(*lists, key=lambda element: self.position[id(element)]))
+
+    def _merge_unique(self, lists):
+        """文書順にまとめ、複数のリストに含まれていた要素は1つだけ残す"""
+        # 同じ要素は隣り合うので、続けて出てきたものを除く
+        elements = []
+        for element in self._merge(lists):
+            if not elements or elements[-1] is not element:
+                elements.append(element)
+        return elements
+
+    def find_all(self, names):
+        """タグ名（または名前のリスト）に一致する要素を文書順で返す"""
+        if isinstance(names, str):
+            return list(self.by_tag.get(names, []))
+        return self._merge([self.by_tag.get(name, []) for name in names])
+
+    def find(self, name, id=None):
+        """タグ名（とid）に一致する最初の要素を返す"""
+        candidates = self.by_id.get(id, []) if id is not None else self.by_tag.get(name, [])
+        for element in candidates:
+            if element.name == name:
+                return element
+        return None
+
+    def find_by_class(self, class_name):
+        """クラス名を持つ要素を文書順で返す"""
+        return list(self.by_class.get(class_name, []))
+
+    def get_by_id(self, element_id):
+        """idを持つ最初の要素を返す"""
+        elements = self.by_id.get(element_id)
+        return elements[0] if elements else None
+
+    def find_by_attr(self, attr_name):
+        """属性を持つ要素を文書順で返す"""
+        return list(self.by_attr.get(attr_name, []))
+
+    def attr_names_with_prefix(self, prefix):
+        """指定した文字で始まる属性名の一覧を返す（例: 'data-'）"""
+        return _names_with_prefix(self.attr_names, prefix)
+
+    def find_by_attr_prefix(self, prefix):
+        """指定した文字で始まる属性を1つ以上持つ要素を文書順で返す"""
+        return self._merge_unique([self.by_attr[name] for name in self.attr_names_with_prefix(prefix)])
+
+    def class_names_with_prefix(self, prefix):
+        """指定した文字で始まるクラス名の一覧を返す"""
+        return _names_with_prefix(self.class_names, prefix)
+
+    def find_by_classes(self, class_names, tags=None, prefix=False):
+        """
+        複数のクラス名をまとめて検索し、{クラス名: 要素のリスト} を返す
+
+        tags: 指定したタグ名の要素だけに絞り込む（例: ['ul', 'ol']）
+        prefix: Trueならクラス名の前方一致、Falseなら完全一致で探す
+        """
+        results = {}
+        for class_name in class_names:
+            tokens = self.class_names_with_prefix(class_name) if prefix else [class_name]
+            elements = self._merge_unique([self.by_class.get(token, []) for token in tokens])
+            if tags is not None:
+                elements = [element for element in elements if element.name in tags]
+            results[class_name] = elements
+        return results
+
+
+def _names_with_prefix(sorted_names, prefix):
+    """並べ替え済みの名前から、指定した文字で始まるものを二分探索で取り出す"""
+    i = bisect.bisect_left(sorted_names, prefix)
+    names = []
+    while i < len(sorted_names) and sorted_names[i].startswith(prefix):
+        names.append(sorted_names[i])
+        i += 1
+    return names
+
+
+# 索引を保存するsoupの属性名（索引はsoupと一緒に不要になり、一緒に削除される）
+_INDEX_ATTR = '_doc_index'
+
+
+def get_index(soup):
+    """
+    soupの索引を返す（初回だけ作成し、以降は同じものを使い回す）
+
+    注意: 索引を作った後にsoupを書き換えた場合、索引には反映されません
+    """
+    # soup.xxx で存在しない名前を読むと find('xxx') になるので、__dict__ から直接取り出す
+    index = soup.__dict__.get(_INDEX_ATTR)
+    if index is None:
+        index = DocumentIndex(soup)
+        setattr(soup, _INDEX_ATTR, index)
+    return index
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ファイル操作の共通関数
+"""
+
+import os
+import threading
+
+
+def write_atomic(path, data):
+    """一時ファイルに書いてから置き換える（途中で止まっても壊れない）"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
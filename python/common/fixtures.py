@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+レスポンスの記録・再生（オフライン実行用）
+環境変数 SCRAPE_MODE で動作を切り替えます。
+
+- SCRAPE_MODE=record : 実際に取得したレスポンスをヘッダーごと保存する
+- SCRAPE_MODE=replay : 保存したレスポンスを返し、ネットワークには接続しない
+
+保存先は環境変数 SCRAPE_ARCHIVE で変更できます（既定: fixtures）。
+共有Sessionのアダプターを差し替えるので、get_soup()も画像ダウンロードも
+スクリプトを書き換えずに記録・再生できます。
+
+実行例（pythonフォルダで実行）:
+    SCRAPE_MODE=record python table/scrape_table.py
+    SCRAPE_MODE=replay python table/scrape_table.py
+"""
+
+import hashlib
+import json
+import os
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from common.fileutil import write_atomic
+from common.responses import build_response
+
+MODE_ENV = 'SCRAPE_MODE'
+ARCHIVE_ENV = 'SCRAPE_ARCHIVE'
+DEFAULT_ARCHIVE = 'fixtures'
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+# 同じURLでもレスポンスが変わるリクエストヘッダー（記録のキーに含める）
+# Range なら206の一部分だけ、If-None-Match なら304 が返ってくる
+KEY_HEADERS = ('Range', 'If-Range', 'If-None-Match', 'If-Modified-Since',
+               'Accept', 'Accept-Language')
+
+
+def get_mode():
+    """現在のモード（'record' / 'replay' / None）を返す"""
+    mode = os.environ.get(MODE_ENV, '').strip().lower()
+    if not mode:
+        return None
+    if mode not in (RECORD, REPLAY):
+        raise ValueError(f"{MODE_ENV}には'{RECORD}'か'{REPLAY}'を指定してください: {mode}")
+    return mode
+
+
+def get_archive_dir():
+    """記録ファイルの保存先フォルダを返す"""
+    return os.environ.get(ARCHIVE_ENV) or DEFAULT_ARCHIVE
+
+
+def _key_headers(headers):
+    """レスポンスを変えるヘッダーだけを (名前, 値) のリストにする"""
+    if not headers:
+        return []
+    return [(name, headers[name]) for name in KEY_HEADERS if headers.get(name) is not None]
+
+
+def _entry_paths(archive_dir, method, url, headers=None):
+    """
+    リクエストに対応する本文ファイルとメタ情報ファイルのパスを返す
+
+    KEY_HEADERS のヘッダーが付いていれば、それもキーに含める
+    （付いていなければ、以前の記録と同じキーになる）
+    """
+    text = f"{method} {url}"
+    for name, value in _key_headers(headers):
+        text += f"\n{name}: {value}"
+    key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    return os.path.join(archive_dir, key + '.body'), os.path.join(archive_dir, key + '.json')
+
+
+def save_entry(archive_dir, method, url, response, headers=None):
+    """レスポンスを本文・ヘッダーごと保存する（headers: リクエストヘッダー）"""
+    os.makedirs(archive_dir, exist_ok=True)
+    body_path, meta_path = _entry_paths(archive_dir, method, url, headers)
+    meta = {
+        'method': method,
+        'url': url,
+        'request_headers': dict(_key_headers(headers)),
+        'status_code': response.status_code,
+        'reason': response.reason,
+        'headers': dict(response.headers),
+    }
+    write_atomic(body_path, response.content)
+    write_atomic(meta_path, json.dumps(meta, ensure_ascii=False, indent=2).encode('utf-8'))
+
+
+def load_entry(archive_dir, method, url, headers=None):
+    """保存したメタ情報と本文を返す（なければNone）"""
+    body_path, meta_path = _entry_paths(archive_dir, method, url, headers)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(body_path, 'rb') as f:
+            body = f.read()
+    except FileNotFoundError:
+        return None
+    return meta, body
+
+
+class RecordingAdapter(HTTPAdapter):
+    """通常どおり通信し、受け取ったレスポンスを保存するアダプター"""
+
+    def __init__(self, archive_dir, **kwargs):
+        self.archive_dir = archive_dir
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        # 保存のために本文を読み込む（stream=Trueでも以降はこの本文が使われる）
+        save_entry(self.archive_dir, request.method, request.url, response, request.headers)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """保存したレスポンスだけを返すアダプター（ネットワークに接続しない）"""
+
+    def __init__(self, archive_dir):
+        self.archive_dir = archive_dir
+        super().__init__()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        entry = load_entry(self.archive_dir, request.method, request.url, request.headers)
+        if entry is None:
+            raise requests.exceptions.ConnectionError(
+                f"記録されていないリクエストです: {request.method} {request.url}", request=request)
+        meta, body = entry
+        return build_response(request.url, body, meta['headers'],
+                              status_code=meta['status_code'], reason=meta['reason'],
+                              request=request)
+
+    def close(self):
+        pass
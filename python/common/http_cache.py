@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ディスク上のHTTPキャッシュ（条件付きGET）
+取得したHTMLを検証子（ETag / Last-Modified）と一緒に保存しておき、
+次回は If-None-Match / If-Modified-Since を付けて問い合わせます。
+サーバーが304（変更なし）を返したら本文はディスクから読み込みます。
+
+学習ポイント:
+- ETagとLast-Modifiedによる更新確認の仕組み
+- 304 Not Modified のときは本文が送られてこない
+- ファイルの更新時刻を「最後に使った時刻」としてLRU削除に利用する
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+from common.fileutil import write_atomic
+from common.responses import build_response
+
+# キャッシュの保存先
+CACHE_DIR = os.path.join("output", ".cache", "http")
+
+# キャッシュ全体の上限サイズ（これを超えたら古いものから削除）
+MAX_CACHE_BYTES = 50 * 1024 * 1024
+
+# 削除は同時に1つのスレッドだけが行う（並列取得で同じファイルを消し合わないように）
+_evict_lock = threading.Lock()
+
+# フォルダごとのキャッシュの合計サイズ（見積もり）。上限を超えたときだけフォルダを調べ直す
+_estimated_bytes = {}
+
+
+def _entry_paths(url, cache_dir):
+    """URLに対応する本文ファイルとメタ情報ファイルのパスを返す"""
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, key + '.body'), os.path.join(cache_dir, key + '.json')
+
+
+def load(url, cache_dir=CACHE_DIR):
+    """キャッシュ済みのメタ情報を返す（なければNone）"""
+    body_path, meta_path = _entry_paths(url, cache_dir)
+    if not os.path.exists(body_path):
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def conditional_headers(meta):
+    """更新確認用のリクエストヘッダーを作る"""
+    headers = {}
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+    return headers
+
+
+def store(url, response, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """検証子を持つレスポンスをキャッシュに保存する"""
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if not etag and not last_modified:
+        return
+    if 'no-store' in response.headers.get('Cache-Control', ''):
+        return
+
+    os.makedirs(cache_dir, exist_ok=True)
+    body_path, meta_path = _entry_paths(url, cache_dir)
+    meta = {
+        'url': url,
+        'etag': etag,
+        'last_modified': last_modified,
+        'content_type': response.headers.get('Content-Type'),
+    }
+    write_atomic(body_path, response.content)
+    write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+
+    with _evict_lock:
+        estimated = _estimated_bytes.get(cache_dir)
+        if estimated is not None:
+            # 上書きでも足すので多めの見積もりになる（超えたら evict() で正確に数え直す）
+            _estimated_bytes[cache_dir] = estimated + len(response.content)
+    if estimated is None or estimated + len(response.content) > max_bytes:
+        evict(cache_dir, max_bytes)
+
+
+def refresh(url, meta, response, cache_dir=CACHE_DIR):
+    """304のレスポンスで検証子が更新されていればメタ情報を書き直す"""
+    etag = response.headers.get('ETag') or meta.get('etag')
+    last_modified = response.headers.get('Last-Modified') or meta.get('last_modified')
+    if etag == meta.get('etag') and last_modified == meta.get('last_modified'):
+        return
+    meta = dict(meta, etag=etag, last_modified=last_modified)
+    _, meta_path = _entry_paths(url, cache_dir)
+    write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+
+
+def cached_response(url, meta, cache_dir=CACHE_DIR):
+    """
+    キャッシュの本文から200のレスポンスを組み立てる
+
+    別のスレッドが削除した直後で本文がなければNoneを返す
+    """
+    body_path, _ = _entry_paths(url, cache_dir)
+    try:
+        with open(body_path, 'rb') as f:
+            body = f.read()
+        # 更新時刻を「最後に使った時刻」にする（LRU用）
+        os.utime(body_path)
+    except FileNotFoundError:
+        return None
+
+    headers = {
+        key: value for key, value in (
+            ('Content-Type', meta.get('content_type')),
+            ('ETag', meta.get('etag')),
+            ('Last-Modified', meta.get('last_modified')),
+        ) if value
+    }
+    response = build_response(url, body, headers)
+    response.from_cache = True
+    return response
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """上限サイズを超えた分を、最後に使った時刻が古い順に削除する"""
+    with _evict_lock:
+        _evict(cache_dir, max_bytes)
+
+
+def _evict(cache_dir, max_bytes):
+    entries = []
+    total = 0
+    for entry in os.scandir(cache_dir):
+        if not entry.name.endswith('.body'):
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            # 調べている間に置き換え・削除されたファイルは数えない
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total += stat.st_size
+    _estimated_bytes[cache_dir] = total
+    if total <= max_bytes:
+        return
+
+    entries.sort()
+    for _, size, body_path in entries:
+        if total <= max_bytes:
+            break
+        meta_path = body_path[:-len('.body')] + '.json'
+        for path in (body_path, meta_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        total -= size
+    _estimated_bytes[cache_dir] = total
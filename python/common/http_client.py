@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共通HTTPクライアント
+全スクレイパーで1つのrequests.Sessionを共有し、接続（TCP+TLS）を再利用します。
+
+学習ポイント:
+- Sessionを使うとKeep-Aliveで同じホストへの接続が使い回される
+- HTTPAdapterでホストごとのコネクションプールの大きさを決められる
+- ヘッダーとタイムアウトを1か所で管理する
+- HTMLページは条件付きGETでディスクキャッシュを使う（http_cache.py）
+- 429/503や接続エラーはレート制限付きで再試行する（rate_limit.py）
+- SCRAPE_MODE=record / replay でレスポンスを記録・再生できる（fixtures.py）
+- 解析にはインストール済みの一番速いパーサーを使う（parser.py）
+"""
+
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common import fixtures, http_cache, parser, rate_limit
+
+# 全スクレイパー共通のリクエストヘッダー
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# タイムアウト（接続, 読み込み）秒
+DEFAULT_TIMEOUT = (5, 30)
+
+# プールに保持するホスト数と、1ホストあたりの既定の接続数
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 10
+
+# ホストごとの接続数（画像を並列ダウンロードするホストは多めにする）
+HOST_POOL_SIZES = {
+    'scraping-practice-six.vercel.app': 16,
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _make_adapter(pool_connections, pool_maxsize):
+    """記録・再生モードに応じたアダプターを作る"""
+    mode = fixtures.get_mode()
+    if mode == fixtures.REPLAY:
+        return fixtures.ReplayAdapter(fixtures.get_archive_dir())
+    if mode == fixtures.RECORD:
+        return fixtures.RecordingAdapter(fixtures.get_archive_dir(),
+                                         pool_connections=pool_connections,
+                                         pool_maxsize=pool_maxsize)
+    return HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+
+
+def _mount_host_pool(session, host, maxsize):
+    """指定ホスト専用のコネクションプールを登録する（前のプールがあれば閉じる）"""
+    adapter = _make_adapter(1, maxsize)
+    old_adapters = []
+    for scheme in ('https', 'http'):
+        prefix = f"{scheme}://{host}/"
+        # get_adapter() は共通のアダプターを返すことがあるので、このホスト専用のものだけを取り出す
+        old = session.adapters.get(prefix)
+        if old is not None and old not in old_adapters:
+            old_adapters.append(old)
+        session.mount(prefix, adapter)
+    # 置き換えたアダプターの接続は、ガベージコレクションを待たずに閉じる
+    for old in old_adapters:
+        old.close()
+
+
+def get_session():
+    """共有Sessionを返す（初回呼び出し時に作成）"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.headers.update(DEFAULT_HEADERS)
+                adapter = _make_adapter(POOL_CONNECTIONS, POOL_MAXSIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                for host, maxsize in HOST_POOL_SIZES.items():
+                    _mount_host_pool(session, host, maxsize)
+                _session = session
+    return _session
+
+
+def set_host_pool_size(url_or_host, maxsize):
+    """ホストの接続数を変更する（並列数を増やすときに使う）"""
+    host = urlsplit(url_or_host).netloc or url_or_host
+    if HOST_POOL_SIZES.get(host) == maxsize:
+        # 同じ大きさなら登録し直す必要はない
+        return
+    HOST_POOL_SIZES[host] = maxsize
+    if _session is not None:
+        _mount_host_pool(_session, host, maxsize)
+
+
+def ensure_host_pool_size(url_or_host, maxsize):
+    """ホストの接続数が maxsize より少なければ増やす（同時接続数がプールを超えないようにする）"""
+    host = urlsplit(url_or_host).netloc or url_or_host
+    if HOST_POOL_SIZES.get(host, POOL_MAXSIZE) < maxsize:
+        set_host_pool_size(host, maxsize)
+
+
+def _get(url, timeout, **kwargs):
+    """ホストごとのレート制限と再試行を通してGETを送る"""
+    session = get_session()
+    if fixtures.get_mode() == fixtures.REPLAY:
+        # 再生時は通信しないので待つ必要がない
+        return session.get(url, timeout=timeout, **kwargs)
+    return rate_limit.send_with_retry(
+        lambda: session.get(url, timeout=timeout, **kwargs), url)
+
+
+def fetch(url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """共有Sessionでページを取得し、エラーがあれば例外を発生させる"""
+    response = _get(url, timeout, **kwargs)
+    response.raise_for_status()
+    return response
+
+
+def fetch_page(url, use_cache=True, timeout=DEFAULT_TIMEOUT):
+    """
+    HTMLページを取得する
+
+    キャッシュがあれば If-None-Match / If-Modified-Since を付けて問い合わせ、
+    304（変更なし）が返ってきたらディスクの本文を使う
+    """
+    if not use_cache or fixtures.get_mode():
+        # 記録・再生時は304ではなく本文そのものを扱う
+        return fetch(url, timeout=timeout)
+
+    meta = http_cache.load(url)
+    headers = http_cache.conditional_headers(meta) if meta else {}
+    response = _get(url, timeout, headers=headers)
+    if response.status_code == 304 and meta:
+        http_cache.refresh(url, meta, response)
+        cached = http_cache.cached_response(url, meta)
+        if cached is not None:
+            return cached
+        # 問い合わせている間に本文が削除された場合は、条件なしで取り直す
+        response = _get(url, timeout)
+    response.raise_for_status()
+    http_cache.store(url, response)
+    return response
+
+
+def get_soup(url, use_cache=True, parser_name=None, parse_only=None):
+    """
+    ページを取得してBeautifulSoupオブジェクトを返す
+
+    parse_only: 指定した部分だけを解析する（parser.strainer_for()の戻り値など）
+    """
+    response = fetch_page(url, use_cache=use_cache)
+    return parser.make_soup(response.content, parser_name, parse_only=parse_only)
+
+
+def close_session():
+    """共有Sessionを閉じてプール内の接続を解放する"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
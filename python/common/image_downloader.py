@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+並列・ストリーミング画像ダウンローダー
+複数の画像を決まった数のワーカーで同時にダウンロードします。
+
+途中で止まっても、再実行すると続きから取得します。
+- 本体は <ファイル名>.part に書き、最後まで受け取ってから名前を変える
+  （途中で切れたファイルが完成品と同じ名前で残らない）
+- ファイルごとの状態（URL・受信バイト数・ETagなど・ハッシュ値）を
+  ダウンロード先の .manifest.jsonl に記録する
+- 取得済みのファイルは飛ばし、.part が残っていれば Range リクエストで続きだけを受け取る
+
+学習ポイント:
+- ThreadPoolExecutorで同時実行数を制限する
+- stream=Trueとiter_content()で本体を少しずつファイルに書き込む
+  （大きな画像でもメモリ使用量が増えない）
+- 処理時間から転送速度（bytes/s, images/s）を計算する
+- Range: bytes=N- で N バイト目以降だけを要求できる（206 Partial Content）
+- If-Range に ETag を付けると、サーバーのファイルが変わっていたら全体（200）が返る
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
+
+from common import http_client, sinks
+from common.fileutil import write_atomic
+
+# 既定の同時ダウンロード数
+DEFAULT_WORKERS = 8
+
+# 1回に読み書きするバイト数
+CHUNK_SIZE = 64 * 1024
+
+# ダウンロード先に置く状態の記録（マニフェスト）
+MANIFEST_NAME = '.manifest.jsonl'
+
+# 受信中のファイルに付ける拡張子
+PART_SUFFIX = '.part'
+
+# download_file() が返す状態
+DOWNLOADED = '取得'
+RESUMED = '再開'
+SKIPPED = 'スキップ'
+
+
+class DownloadManifest:
+    """
+    ファイルごとのダウンロードの状態を記録する
+
+    状態が変わるたびに1行追記する（JSON Lines）。読み込むときは同じファイルの
+    後の行で上書きするので、途中で止まっても最後に書けた状態が残る。
+    各行: file, url, bytes（受信済みバイト数）, total, etag, last_modified, sha256, complete
+    """
+
+    def __init__(self, folder):
+        self.path = os.path.join(folder, MANIFEST_NAME)
+        self.entries = self._load()
+        self._lock = threading.Lock()
+        self._sink = None
+
+    def _load(self):
+        entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 書いている途中で止まった最後の行は使わない
+                        continue
+                    entries[entry['file']] = entry
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def get(self, filename):
+        with self._lock:
+            return self.entries.get(filename)
+
+    def update(self, filename, **values):
+        """ファイルの状態を更新して1行追記する"""
+        with self._lock:
+            entry = {**self.entries.get(filename, {}), 'file': filename, **values}
+            self.entries[filename] = entry
+            if self._sink is None:
+                # 1行ごとにファイルへ反映する（止まっても記録が残るように）
+                self._sink = sinks.JsonLinesSink(self.path, append=True, flush_seconds=0)
+            self._sink.write(entry)
+        return entry
+
+    def compact(self):
+        """最新の状態だけを残して書き直す（追記してきた古い行を消す）"""
+        with self._lock:
+            if self._sink is not None:
+                self._sink.close()
+                self._sink = None
+            if not self.entries:
+                return
+            data = ''.join(json.dumps(entry, ensure_ascii=False) + '\n'
+                           for entry in self.entries.values())
+            write_atomic(self.path, data.encode('utf-8'))
+
+
+def _is_complete(entry, url, file_path):
+    """前回までに最後まで取得できているかを返す"""
+    return (entry is not None and entry.get('complete') and entry.get('url') == url
+            and os.path.exists(file_path) and os.path.getsize(file_path) == entry.get('bytes'))
+
+
+def _resumes_at(response, offset):
+    """レスポンスが offset バイト目からの続き（206）かを返す"""
+    content_range = response.headers.get('Content-Range', '')
+    return response.status_code == 206 and content_range.startswith(f'bytes {offset}-')
+
+
+def _hash_file(path, digest, chunk_size=CHUNK_SIZE):
+    """受信済みの部分をハッシュ値の計算に加える"""
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+
+
+def download_file(url, file_path, manifest=None, chunk_size=CHUNK_SIZE):
+    """
+    1つのファイルをチャンク単位で保存し、(状態, 今回受信したバイト数) を返す
+
+    状態は '取得' / '再開'（途中から取得） / 'スキップ'（取得済み）のどれか。
+    manifest を渡すと、取得済みなら飛ばし、前回の .part が残っていれば続きから受け取る
+    """
+    filename = os.path.basename(file_path)
+    part_path = file_path + PART_SUFFIX
+    entry = manifest.get(filename) if manifest is not None else None
+    if _is_complete(entry, url, file_path):
+        return SKIPPED, 0
+
+    # 同じURLで検証子（ETag / Last-Modified）があるときだけ続きから受け取る
+    offset = 0
+    headers = {}
+    if entry is not None and entry.get('url') == url and os.path.exists(part_path):
+        validator = entry.get('etag') or entry.get('last_modified')
+        if validator:
+            offset = os.path.getsize(part_path)
+        if offset:
+            headers = {'Range': f'bytes={offset}-', 'If-Range': validator}
+
+    try:
+        response = http_client.fetch(url, stream=True, headers=headers)
+    except requests.HTTPError as e:
+        if not offset or e.response is None or e.response.status_code != 416:
+            raise
+        # 416（範囲が正しくない）のときは最初から取り直す
+        offset = 0
+        response = http_client.fetch(url, stream=True)
+
+    with response:
+        if offset and not _resumes_at(response, offset):
+            # 200（全体）が返ってきた＝サーバーのファイルが変わったので最初から
+            offset = 0
+        digest = hashlib.sha256()
+        if offset:
+            _hash_file(part_path, digest, chunk_size)
+
+        length = response.headers.get('Content-Length')
+        expected = int(length) if length and 'Content-Encoding' not in response.headers else None
+        if manifest is not None:
+            manifest.update(filename, url=url, bytes=offset, complete=False, sha256=None,
+                            total=offset + expected if expected is not None else None,
+                            etag=response.headers.get('ETag'),
+                            last_modified=response.headers.get('Last-Modified'))
+
+        received = 0
+        try:
+            with open(part_path, 'ab' if offset else 'wb') as f:
+                for chunk in response.iter_content(chunk_size):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    received += len(chunk)
+            if expected is not None and received < expected:
+                raise IOError(f"途中で切れました（{received:,} / {expected:,} bytes）")
+        except BaseException:
+            # 受け取れたところまでを記録しておき、次回はその続きから
+            if manifest is not None:
+                manifest.update(filename, bytes=offset + received)
+            raise
+
+    os.replace(part_path, file_path)
+    if manifest is not None:
+        manifest.update(filename, bytes=offset + received, sha256=digest.hexdigest(), complete=True)
+    return (RESUMED if offset else DOWNLOADED), received
+
+
+def download_to_store(url, filenames, download_folder, manifest, store):
+    """
+    ストアを使って1つのURLを取得し、filenames のすべてを実体へのハードリンクにする
+
+    前に取得したURLなら通信せずにリンクだけ作る。戻り値は download_file() と同じ
+    """
+    paths = [os.path.join(download_folder, filename) for filename in filenames]
+    digest = store.lookup(url)
+    if digest is not None:
+        status, received = SKIPPED, 0
+    else:
+        status, received = download_file(url, paths[0], manifest)
+        digest = manifest.get(filenames[0])['sha256']
+        store.add(paths[0], digest, url)
+    for path in paths:
+        store.link(digest, path)
+    return status, received
+
+
+def download_images(items, download_folder, workers=DEFAULT_WORKERS, store=None):
+    """
+    画像を並列でダウンロードする
+
+    items: (画像URL, ファイル名) のリスト
+    store: ImageStore を渡すと、同じURLは1回だけ取得し、画像の実体はストアに1つだけ置く
+           （download_folder にはハードリンクを作る。前の実行で取得したURLは通信しない）
+    戻り値: 件数・バイト数・所要時間をまとめた辞書
+           （バイト数は今回受信した分。取得済みで飛ばした画像は「スキップ」に数える）
+    """
+    # 同時接続数がプールの大きさを超えないようにする
+    for host in {urlsplit(url).netloc for url, _ in items}:
+        http_client.ensure_host_pool_size(host, workers)
+
+    # URLごとに保存するファイル名をまとめる（ストアを使わない場合は1件ずつ）
+    if store is not None:
+        targets = {}
+        for url, filename in items:
+            targets.setdefault(url, []).append(filename)
+        tasks = list(targets.items())
+    else:
+        tasks = [(url, [filename]) for url, filename in items]
+
+    succeeded = 0
+    failed = 0
+    total_bytes = 0
+    counts = {DOWNLOADED: 0, RESUMED: 0, SKIPPED: 0}
+    manifest = DownloadManifest(download_folder)
+    start = time.perf_counter()
+
+    def run(url, filenames):
+        if store is not None:
+            return download_to_store(url, filenames, download_folder, manifest, store)
+        return download_file(url, os.path.join(download_folder, filenames[0]), manifest)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(run, url, filenames): filenames for url, filenames in tasks}
+            for future in as_completed(futures):
+                filenames = futures[future]
+                try:
+                    status, received = future.result()
+                    total_bytes += received
+                    counts[status] += 1
+                    succeeded += len(filenames)
+                except Exception as e:
+                    failed += len(filenames)
+                    print(f"  ✗ ダウンロード失敗: {', '.join(filenames)} - {e}")
+    finally:
+        manifest.compact()
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        '成功': succeeded,
+        '失敗': failed,
+        '再開': counts[RESUMED],
+        'スキップ': counts[SKIPPED],
+        '重複': len(items) - len(tasks),
+        'バイト数': total_bytes,
+        '所要時間': elapsed,
+    }
+    print_summary(stats, workers)
+    return stats
+
+
+def print_summary(stats, workers):
+    """ダウンロードのスループットを表示する"""
+    elapsed = stats['所要時間']
+    bytes_per_sec = stats['バイト数'] / elapsed if elapsed > 0 else 0
+    images_per_sec = stats['成功'] / elapsed if elapsed > 0 else 0
+    print(f"  ワーカー数: {workers}")
+    print(f"  成功: {stats['成功']}件 / 失敗: {stats['失敗']}件")
+    if stats.get('再開') or stats.get('スキップ'):
+        print(f"  うち途中から再開: {stats['再開']}件 / 取得済みでスキップ: {stats['スキップ']}件")
+    if stats.get('重複'):
+        print(f"  同じURLの重複: {stats['重複']}件（1回だけ取得してリンク）")
+    print(f"  合計: {stats['バイト数']:,} bytes ({elapsed:.2f}秒)")
+    print(f"  速度: {bytes_per_sec:,.0f} bytes/s, {images_per_sec:.1f} images/s")
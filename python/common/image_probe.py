@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+画像の形式・サイズだけを調べる（本体をダウンロードしない）
+画像ファイルの先頭数KBだけを読み、先頭のバイト列（マジックナンバー）から本当の形式を、
+ヘッダーから幅と高さを取り出します。
+
+先頭だけを要求する Range: bytes=0-N を付けて取得し（足りなければ続きを要求）、
+サーバーが Range に対応していなくても必要な分を読んだところで接続を閉じるので、
+転送量は画像1枚あたり数KBで済みます。
+
+対応形式: JPEG / PNG / GIF / WebP / BMP（SVGは形式だけ）
+
+学習ポイント:
+- ファイルの形式は拡張子ではなく先頭のバイト列で判断する（PNGなら b'\\x89PNG'）
+- struct.unpack() でバイト列から数値を取り出す（'>' はビッグエンディアン、'<' はリトルエンディアン）
+- JPEGはマーカー（0xFF + 種類）が並んだ形式で、SOFマーカーに幅と高さがある
+
+使い方:
+    info = probe_image('https://example.com/a.jpg')
+    # {'形式': 'jpeg', '拡張子': '.jpg', '幅': 640, '高さ': 480, 'ファイルサイズ': 51234, '読んだバイト数': 1024}
+"""
+
+import struct
+
+import requests
+
+from common import concurrency, http_client
+
+# 最初に要求するバイト数（ほとんどの画像はこれで足りる）
+PROBE_BYTES = 8 * 1024
+
+# JPEGのEXIFが大きい場合などに、ここまでは読み進める
+MAX_PROBE_BYTES = 64 * 1024
+
+# 受信したデータを調べる単位
+READ_SIZE = 1024
+
+# 形式ごとの拡張子
+EXTENSIONS = {
+    'jpeg': '.jpg',
+    'png': '.png',
+    'gif': '.gif',
+    'webp': '.webp',
+    'bmp': '.bmp',
+    'svg': '.svg',
+}
+
+# 幅・高さが入っているJPEGのマーカー（SOF0〜SOF15。DHT・JPG・DACは除く）
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                     0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# 長さを持たないJPEGのマーカー（RST0〜7, SOI, EOI, TEM）
+_JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8, 0xD9}
+
+
+def sniff_format(data):
+    """先頭のバイト列から画像の形式を返す（分からなければNone）"""
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if data.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    if data.startswith(b'BM'):
+        return 'bmp'
+    head = data[:256].lstrip().lower()
+    if head.startswith(b'<svg') or (head.startswith(b'<?xml') and b'<svg' in head):
+        return 'svg'
+    return None
+
+
+def _png_size(data):
+    # 8バイトの署名のあとにIHDRチャンクがあり、幅と高さが4バイトずつ入っている
+    if len(data) < 24 or data[12:16] != b'IHDR':
+        return None
+    return struct.unpack('>II', data[16:24])
+
+
+def _gif_size(data):
+    if len(data) < 10:
+        return None
+    return struct.unpack('<HH', data[6:10])
+
+
+def _bmp_size(data):
+    if len(data) < 26:
+        return None
+    width, height = struct.unpack('<ii', data[18:26])
+    # 高さが負の値なら上から下への並び（大きさは絶対値）
+    return width, abs(height)
+
+
+def _webp_size(data):
+    chunk = data[12:16]
+    if chunk == b'VP8 ' and len(data) >= 30:
+        # 非可逆: フレームの開始コード（9d 01 2a）のあとに14ビットずつ
+        if data[23:26] != b'\x9d\x01\x2a':
+            return None
+        width, height = struct.unpack('<HH', data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and len(data) >= 25:
+        # 可逆: 署名（0x2f）のあとに「幅-1」「高さ-1」が14ビットずつ
+        if data[20] != 0x2F:
+            return None
+        bits = struct.unpack('<I', data[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X' and len(data) >= 30:
+        # 拡張形式: キャンバスの「幅-1」「高さ-1」が3バイトずつ
+        width = int.from_bytes(data[24:27], 'little') + 1
+        height = int.from_bytes(data[27:30], 'little') + 1
+        return width, height
+    return None
+
+
+def _jpeg_size(data):
+    # SOI（FFD8）の次からマーカーを順にたどり、SOFマーカーを探す
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # 埋め草の0xFFは読み飛ばす
+            i += 1
+            continue
+        if marker in _JPEG_STANDALONE_MARKERS:
+            i += 2
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            height, width = struct.unpack('>HH', data[i + 5:i + 9])
+            return width, height
+        length = struct.unpack('>H', data[i + 2:i + 4])[0]
+        i += 2 + length
+    # SOFマーカーまでまだ読んでいない
+    return None
+
+
+_SIZE_PARSERS = {
+    'jpeg': _jpeg_size,
+    'png': _png_size,
+    'gif': _gif_size,
+    'webp': _webp_size,
+    'bmp': _bmp_size,
+}
+
+
+def image_size(data):
+    """
+    画像の先頭部分から (形式, 幅, 高さ) を返す
+
+    形式が分からなければ (None, None, None)、幅と高さがまだ読めていなければ (形式, None, None)
+    """
+    image_format = sniff_format(data)
+    parse = _SIZE_PARSERS.get(image_format)
+    size = parse(data) if parse is not None else None
+    if size is None:
+        return image_format, None, None
+    return image_format, size[0], size[1]
+
+
+def _total_size(response):
+    """レスポンスのヘッダーからファイル全体のバイト数を返す（分からなければNone）"""
+    content_range = response.headers.get('Content-Range', '')
+    if '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get('Content-Length')
+    if response.status_code == 200 and length and length.isdigit():
+        return int(length)
+    return None
+
+
+def probe_image(url, probe_bytes=PROBE_BYTES, max_bytes=MAX_PROBE_BYTES):
+    """
+    画像の先頭だけを読んで形式・幅・高さを調べる
+
+    まず先頭 probe_bytes バイトを要求し、幅と高さが見つからなければ
+    続きを要求して max_bytes まで読み進める。
+    戻り値: 形式・拡張子・幅・高さ・ファイルサイズ・読んだバイト数の辞書
+    """
+    data = b''
+    limit = probe_bytes
+    total = None
+    content_type = ''
+    while True:
+        headers = {'Range': f'bytes={len(data)}-{limit - 1}'}
+        try:
+            response = http_client.fetch(url, stream=True, headers=headers)
+        except requests.HTTPError as e:
+            # ファイルがちょうど前回の limit バイトで終わっていると、続きの範囲は
+            # 416（範囲外）になる。ファイルの終わりとして、それまでに読んだ分の結果を使う
+            if data and e.response is not None and e.response.status_code == 416:
+                break
+            raise
+        with response:
+            if response.status_code != 206:
+                # Rangeに対応していないサーバーは先頭から全体を返すので、
+                # max_bytes まで少しずつ読み、幅と高さが分かったところで接続を閉じる
+                data = b''
+                limit = max_bytes
+            total = total or _total_size(response)
+            content_type = response.headers.get('Content-Type', '')
+            for chunk in response.iter_content(READ_SIZE):
+                data += chunk
+                if len(data) >= limit or image_size(data)[1] is not None:
+                    break
+            # with を抜けると接続を閉じる（残りは受け取らない）
+
+        image_format, width, height = image_size(data)
+        if (width is not None or image_format not in _SIZE_PARSERS
+                or len(data) < limit or len(data) >= max_bytes):
+            # 分かった・調べられない形式・ファイルの終わり・上限 のどれか
+            break
+        limit = min(limit * 4, max_bytes)
+
+    if image_format is None:
+        # 先頭で判断できないときは Content-Type を参考にする
+        content_type = content_type.split(';')[0].strip()
+        if content_type.startswith('image/'):
+            image_format = content_type[len('image/'):].replace('svg+xml', 'svg')
+    return {
+        '形式': image_format or '',
+        '拡張子': EXTENSIONS.get(image_format, ''),
+        '幅': width,
+        '高さ': height,
+        'ファイルサイズ': total,
+        '読んだバイト数': len(data),
+    }
+
+
+def probe_images(urls, window=concurrency.DEFAULT_WINDOW):
+    """
+    複数の画像を最大window件ずつ同時に調べ、(URL, 結果, 例外) を元の順番で返すジェネレーター
+    """
+    return concurrency.map_in_order(probe_image, urls, window)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+画像の候補（srcset・遅延読み込み・<picture>）から取得する画像を選ぶ
+最近のページでは、本当の画像が src ではなく次の場所に書かれていることがよくあります。
+
+- srcset="a-320.jpg 320w, a-640.jpg 640w"   : 幅ごとの候補
+- data-src / data-srcset など                 : 遅延読み込み（src は小さな仮の画像）
+- <picture><source srcset="..." type="image/webp"> : 形式ごとの候補
+
+これらをすべて候補として集め、目標の幅（target_width）と形式の優先順（formats）で
+「目標の幅以上で一番小さい候補」を選びます。サムネイル用途なら大きな原寸画像を
+ダウンロードせずに済みます。目標の幅がなければ、ページが表示に使う src
+（仮の画像なら data-src など）を選ぶので、src だけを見ていたときより大きくはなりません。
+
+学習ポイント:
+- srcset の候補は「URL 説明子」をカンマで区切ったもの（説明子は 320w のような幅か 2x のような倍率）
+- URLの中にもカンマが入ることがあるので、単純に split(',') はできない
+- data: で始まるURLは、ページに埋め込まれた仮の画像であることが多い
+- width属性は表示上の幅（CSSピクセル）で、srcset の 320w（画像そのものの幅）とは単位が違う
+
+使い方:
+    candidate = resolve_image(img, page_url, target_width=320, formats=['webp', 'jpeg'])
+    if candidate:
+        print(candidate['url'], candidate['width'], candidate['origin'])
+"""
+
+import os
+import re
+from urllib.parse import urljoin, urlsplit
+
+# 遅延読み込みで本当の画像のURLが書かれることの多い属性（上から順に使う）
+LAZY_SRC_ATTRS = ('data-src', 'data-lazy-src', 'data-original', 'data-url')
+LAZY_SRCSET_ATTRS = ('data-srcset', 'data-lazy-srcset')
+
+# 仮の画像（プレースホルダー）によく使われるファイル名
+PLACEHOLDER_PATTERN = re.compile(r'(placeholder|spacer|blank|transparent|pixel|1x1)\.(gif|png|jpe?g|svg|webp)$',
+                                 re.IGNORECASE)
+
+# 拡張子から分かる形式
+_EXTENSION_FORMATS = {
+    '.jpg': 'jpeg',
+    '.jpeg': 'jpeg',
+    '.png': 'png',
+    '.gif': 'gif',
+    '.webp': 'webp',
+    '.avif': 'avif',
+    '.svg': 'svg',
+    '.bmp': 'bmp',
+}
+
+_DESCRIPTOR_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)([wx])$', re.IGNORECASE)
+
+
+def parse_srcset(value):
+    """
+    srcset の値を (URL, 幅, 倍率) のリストにする
+
+    幅（320w）も倍率（2x）もない候補は倍率1として扱う。
+    URLの途中のカンマ（?w=1,2 など）は区切りとみなさない
+    """
+    candidates = []
+    position = 0
+    length = len(value)
+    while position < length:
+        # 候補の前の空白とカンマを読み飛ばす
+        while position < length and (value[position].isspace() or value[position] == ','):
+            position += 1
+        start = position
+        while position < length and not value[position].isspace():
+            position += 1
+        url = value[start:position]
+        if not url:
+            break
+
+        descriptor = ''
+        if url.endswith(','):
+            # 「URL,」の形なら説明子はない
+            url = url.rstrip(',')
+        else:
+            start = position
+            while position < length and value[position] != ',':
+                position += 1
+            descriptor = value[start:position].strip()
+
+        width = None
+        density = None
+        match = _DESCRIPTOR_PATTERN.match(descriptor)
+        if match:
+            number, unit = match.groups()
+            if unit.lower() == 'w':
+                width = int(float(number))
+            else:
+                density = float(number)
+        elif not descriptor:
+            density = 1.0
+        if url:
+            candidates.append((url, width, density))
+    return candidates
+
+
+def guess_format(url, mime_type=None):
+    """type属性（image/webp など）かURLの拡張子から形式を返す（分からなければNone）"""
+    if mime_type:
+        mime_type = mime_type.split(';')[0].strip().lower()
+        if mime_type.startswith('image/'):
+            return mime_type[len('image/'):].replace('svg+xml', 'svg').replace('jpg', 'jpeg')
+    if url.startswith('data:image/'):
+        return url[len('data:image/'):].split(';')[0].split(',')[0].replace('svg+xml', 'svg')
+    extension = os.path.splitext(urlsplit(url).path)[1].lower()
+    return _EXTENSION_FORMATS.get(extension)
+
+
+def is_placeholder(url):
+    """仮の画像（data: のURL や blank.gif など）らしいかを返す"""
+    if url.startswith('data:'):
+        return True
+    return bool(PLACEHOLDER_PATTERN.search(urlsplit(url).path))
+
+
+def _to_int(value):
+    try:
+        return int(str(value).strip().rstrip('px'))
+    except (TypeError, ValueError):
+        return None
+
+
+def image_candidates(img, base_url):
+    """
+    <img> 要素（と親の <picture>）から画像の候補をすべて集める
+
+    各候補は url（絶対URL）・width・density・format・origin（どの属性から来たか）の辞書。
+    並びは <source> → srcset → data-src → src の順（ページ側が想定する優先順）
+    """
+    candidates = []
+    # width属性があれば、2x などの倍率から幅を計算できる
+    display_width = _to_int(img.get('width'))
+
+    def add_srcset(value, origin, mime_type=None):
+        for url, width, density in parse_srcset(value):
+            if width is None and density is not None and display_width:
+                width = int(display_width * density)
+            candidates.append({
+                'url': urljoin(base_url, url),
+                'width': width,
+                'density': density,
+                'format': guess_format(url, mime_type),
+                'origin': origin,
+            })
+
+    def add_src(url, origin):
+        candidates.append({
+            'url': urljoin(base_url, url),
+            # width属性は表示上の幅で、画像そのものの幅は分からないので比べない
+            'width': None,
+            'density': 1.0,
+            'format': guess_format(url),
+            'origin': origin,
+        })
+
+    # lxmlは <source> の中に <img> を入れた形で解析することがあるので、親をさかのぼって探す
+    picture = img.find_parent('picture')
+    if picture is not None:
+        for source in picture.find_all('source'):
+            for attr in ('srcset',) + LAZY_SRCSET_ATTRS:
+                if source.get(attr):
+                    add_srcset(source[attr], f'source[{attr}]', source.get('type'))
+
+    for attr in ('srcset',) + LAZY_SRCSET_ATTRS:
+        if img.get(attr):
+            add_srcset(img[attr], attr)
+    for attr in LAZY_SRC_ATTRS:
+        if img.get(attr):
+            add_src(img[attr].strip(), attr)
+    if img.get('src'):
+        add_src(img['src'].strip(), 'src')
+    return candidates
+
+
+def choose_image(candidates, target_width=None, formats=None):
+    """
+    候補から1つ選ぶ（選べなければNone）
+
+    target_width: 目標の幅。幅の分かる候補のうち、これ以上で一番小さいものを選ぶ
+                  （足りる候補がなければ一番大きいもの）。Noneなら src（仮の画像なら
+                  data-src など）を選び、どちらもなければ最初の候補
+    formats: 形式の優先順（['webp', 'jpeg'] など）。最初に候補がある形式から選ぶ
+    仮の画像（data: など）は選ばない。同じ条件の候補が複数あれば、前にあるものを選ぶ
+    """
+    real = [c for c in candidates if not is_placeholder(c['url'])]
+    if not real:
+        return None
+    if formats:
+        for image_format in formats:
+            matched = [c for c in real if c['format'] == image_format]
+            if matched:
+                real = matched
+                break
+
+    if not target_width:
+        # 目標の幅がなければ、大きな候補を選ばずにページが表示に使う画像を取得する
+        for origin in ('src',) + LAZY_SRC_ATTRS:
+            for candidate in real:
+                if candidate['origin'] == origin:
+                    return candidate
+        return real[0]
+
+    with_width = [c for c in real if c['width']]
+    if with_width:
+        adequate = [c for c in with_width if c['width'] >= target_width]
+        if adequate:
+            return min(adequate, key=lambda c: c['width'])
+        return max(with_width, key=lambda c: c['width'])
+
+    # 幅が分からなければ倍率1xに一番近いものを選ぶ
+    return min(real, key=lambda c: abs((c['density'] or 1.0) - 1.0))
+
+
+def resolve_image(img, base_url, target_width=None, formats=None):
+    """<img> 要素から取得する画像の候補を選ぶ（なければNone）"""
+    return choose_image(image_candidates(img, base_url), target_width, formats)
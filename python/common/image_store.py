@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内容アドレス方式の画像ストア
+画像を「中身のハッシュ値（sha256）」の名前で1つだけ保存します。
+同じ画像がいくつのページ・何回の実行に出てきても、ディスク上の実体は1つです。
+
+- objects/<先頭2文字>/<ハッシュ値> : 画像の実体
+- index.jsonl                     : URL → ハッシュ値 の対応（前に取得したURLは通信せずに済む）
+
+実行ごとの downloaded_images/ には実体へのハードリンクを置くので、ファイルが
+増えてもディスク使用量は増えません（ハードリンクが作れない場合はコピーします）。
+ハードリンクは実体と同じファイルなので、downloaded_images/ の画像を直接編集しないでください。
+
+学習ポイント:
+- 中身から名前を決めれば、同じ内容のファイルは自然に1つにまとまる
+- os.link() のハードリンクは、1つの実体に複数の名前を付ける仕組み
+- 一時的な名前でリンクを作ってから os.replace() で置き換えると、途中の状態が見えない
+
+使い方:
+    store = ImageStore()
+    digest = store.lookup(url)            # 前に取得したURLならハッシュ値
+    if digest is None:
+        ...                               # ダウンロードしてハッシュ値を計算
+        store.add(path, digest, url)      # 実体をストアに登録
+    store.link(digest, 'output/downloaded_images/image_1.jpg')
+    store.close()
+"""
+
+import json
+import os
+import shutil
+import threading
+
+from common import sinks
+from common.fileutil import write_atomic
+
+# ストアの保存先
+STORE_DIR = os.path.join('output', '.store', 'images')
+
+INDEX_NAME = 'index.jsonl'
+
+
+class ImageStore:
+    """ハッシュ値をキーに画像を保存し、URLとの対応を記録する"""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.index_path = os.path.join(root, INDEX_NAME)
+        self.urls = self._load_index()
+        self._lock = threading.Lock()
+        self._sink = None
+
+    def _load_index(self):
+        urls = {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 書いている途中で止まった最後の行は使わない
+                        continue
+                    urls[entry['url']] = entry['sha256']
+        except FileNotFoundError:
+            pass
+        return urls
+
+    def object_path(self, digest):
+        """ハッシュ値に対応する実体のパス"""
+        return os.path.join(self.root, 'objects', digest[:2], digest)
+
+    def lookup(self, url):
+        """前に取得したURLならハッシュ値を返す（実体がなければNone）"""
+        with self._lock:
+            digest = self.urls.get(url)
+        if digest is not None and os.path.exists(self.object_path(digest)):
+            return digest
+        return None
+
+    def add(self, path, digest, url=None):
+        """
+        ダウンロードしたファイルを実体として登録する
+
+        同じ内容の実体がすでにあれば何もしない（path は link() で実体へのリンクに置き換わる）
+        """
+        object_path = self.object_path(digest)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            _link_or_copy(path, object_path)
+        if url is not None:
+            with self._lock:
+                if self.urls.get(url) != digest:
+                    self.urls[url] = digest
+                    if self._sink is None:
+                        # 1行ごとにファイルへ反映する（止まっても対応が残るように）
+                        self._sink = sinks.JsonLinesSink(self.index_path, append=True,
+                                                         flush_seconds=0)
+                    self._sink.write({'url': url, 'sha256': digest})
+
+    def link(self, digest, dest_path):
+        """dest_path を実体へのハードリンクにする"""
+        object_path = self.object_path(digest)
+        if os.path.exists(dest_path) and os.path.samefile(object_path, dest_path):
+            return
+        _link_or_copy(object_path, dest_path)
+
+    def summary(self):
+        """保存している実体の (件数, 合計バイト数) を返す"""
+        count = 0
+        total = 0
+        for folder, _, filenames in os.walk(os.path.join(self.root, 'objects')):
+            for filename in filenames:
+                count += 1
+                total += os.path.getsize(os.path.join(folder, filename))
+        return count, total
+
+    def close(self):
+        """URLの対応を、最新のものだけ残して書き直す"""
+        with self._lock:
+            if self._sink is None:
+                return
+            self._sink.close()
+            self._sink = None
+            data = ''.join(json.dumps({'url': url, 'sha256': digest}, ensure_ascii=False) + '\n'
+                           for url, digest in self.urls.items())
+            write_atomic(self.index_path, data.encode('utf-8'))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _link_or_copy(src, dest):
+    """dest を src へのハードリンクにする（作れなければコピー）。dest があれば置き換える"""
+    tmp_path = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(src, tmp_path)
+    except OSError:
+        # 別のドライブやハードリンク非対応のファイルシステムではコピーする
+        shutil.copy2(src, tmp_path)
+    os.replace(tmp_path, dest)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+入れ子のリスト（ul / ol / li）の階層を配列で表す
+文書を1回だけたどり、リストと項目を「深さ・親の番号・テキスト」の並んだ配列にします。
+再帰を使わないので、どれだけ深いメニューや分類でも再帰の上限に達しません。
+
+学習ポイント:
+- 木構造は「各ノードの親の番号」を並べた配列だけでも表せる
+- 文書順（行きがけ順）に並べておけば、部分木は配列の連続した範囲になる
+- 再帰の代わりにスタック（リスト）を使って木をたどる
+- 配列のままJSONに保存すれば、他のツールからも読み込める
+
+使い方:
+    tree = build_list_tree(soup)
+    tree.roots()           # 一番外側のリストの番号
+    tree.to_dict()         # JSONに保存できる辞書
+"""
+
+import array
+import json
+
+from bs4 import NavigableString, Tag
+
+LIST_TAGS = ('ul', 'ol')
+
+# 親がいないことを表す番号
+NO_PARENT = -1
+
+
+class ListTree:
+    """リストと項目を文書順に並べた並列配列"""
+
+    def __init__(self):
+        self.tags = []                    # 'ul' / 'ol' / 'li'
+        self.depth = array.array('I')     # 一番外側のリストを0とした深さ
+        self.parent = array.array('i')    # 親ノードの番号（なければ-1）
+        self.text = []                    # 項目の直接のテキスト（リストは空文字）
+
+    def __len__(self):
+        return len(self.tags)
+
+    def add(self, tag, depth, parent, text=''):
+        """ノードを追加してその番号を返す"""
+        self.tags.append(tag)
+        self.depth.append(depth)
+        self.parent.append(parent)
+        self.text.append(text)
+        return len(self.tags) - 1
+
+    def roots(self):
+        """一番外側のリストの番号を返す"""
+        return [i for i, parent in enumerate(self.parent) if parent == NO_PARENT]
+
+    def subtree_end(self, index):
+        """index の部分木の次の番号を返す（部分木は index から連続して並んでいる）"""
+        end = index + 1
+        while end < len(self.tags) and self.depth[end] > self.depth[index]:
+            end += 1
+        return end
+
+    def child_counts(self, tag=None):
+        """各ノードの子ノードの数を返す（tagを指定するとそのタグの子だけ数える）"""
+        counts = array.array('I', bytes(4 * len(self.tags)))
+        for child_tag, parent in zip(self.tags, self.parent):
+            if parent != NO_PARENT and (tag is None or child_tag == tag):
+                counts[parent] += 1
+        return counts
+
+    def to_dict(self):
+        """JSONに保存できる辞書にする"""
+        return {
+            'tags': self.tags,
+            'depth': self.depth.tolist(),
+            'parent': self.parent.tolist(),
+            'text': self.text,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """to_dict() の辞書から作り直す"""
+        tree = cls()
+        tree.tags = list(data['tags'])
+        tree.depth = array.array('I', data['depth'])
+        tree.parent = array.array('i', data['parent'])
+        tree.text = list(data['text'])
+        return tree
+
+    def save(self, path):
+        """JSONファイルに保存する"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        """save() で保存したJSONファイルを読み込む"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def direct_text(element):
+    """子要素の中を含まない、要素の直接のテキストを返す"""
+    return ''.join(child for child in element.contents
+                   if isinstance(child, NavigableString)).strip()
+
+
+def build_list_tree(root):
+    """
+    root の中のリストと項目を1回の走査で ListTree にする
+
+    リスト・項目以外の要素（divやaなど）は飛ばして、その中も探します。
+    """
+    tree = ListTree()
+    # (要素, 親ノードの番号, 子ノードの深さ) を積んで、文書順にたどる
+    stack = [(child, NO_PARENT, 0) for child in reversed(root.contents) if isinstance(child, Tag)]
+    while stack:
+        element, parent, depth = stack.pop()
+        if element.name in LIST_TAGS or element.name == 'li':
+            text = direct_text(element) if element.name == 'li' else ''
+            parent = tree.add(element.name, depth, parent, text)
+            depth += 1
+        for child in reversed(element.contents):
+            if isinstance(child, Tag):
+                stack.append((child, parent, depth))
+    return tree
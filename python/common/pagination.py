@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+複数ページにわたる一覧の巡回
+「次へ」リンクやURLのページ番号からページを見つけ、決まった数ずつ同時に取得します。
+結果はページの順番どおりに返すので、そのままファイルへ書き出せます。
+
+学習ポイント:
+- rel="next" や「次へ」のリンクから次のページのURLを見つける
+- '?page=2' のようなURLが分かれば、残りのページのURLは計算で作れる
+- 同時に取得するのは最大window件まで（順番を保った同時実行は common/concurrency.py）
+
+使い方:
+    urls = page_urls('https://example.com/table?page={page}', start=1, end=100)
+    for url, result, error in map_in_order(read_page, urls, window=8):
+        ...
+"""
+
+import itertools
+import re
+from urllib.parse import urljoin
+
+# 巡回するスクリプトが pagination からそのまま使えるようにする
+from common.concurrency import DEFAULT_WINDOW, map_in_order
+from common.selector import select, select_one
+
+# ページ番号を入れる場所の目印
+PAGE_PLACEHOLDER = '{page}'
+
+# 次のページへのリンクを探すセレクター（上から順に試す）
+NEXT_SELECTORS = [
+    'a[rel~=next]',
+    'link[rel~=next]',
+    '.pagination a.next',
+    'a.next',
+]
+
+# 次のページへのリンクによく使われる文字
+NEXT_TEXTS = ('次へ', '次のページ', '次', 'Next', 'next', '»', '›')
+
+# URLの中のページ番号の場所（?page=2, /page/2, 末尾の/2）
+_PAGE_NUMBER_PATTERNS = [
+    re.compile(r'[?&](?:page|p|pg)=(\d+)'),
+    re.compile(r'/page/(\d+)'),
+    re.compile(r'/(\d+)/?$'),
+]
+
+
+def find_next_url(soup, base_url):
+    """次のページのURLを返す（見つからなければNone）"""
+    for css in NEXT_SELECTORS:
+        link = select_one(soup, css)
+        if link is not None and link.get('href'):
+            return urljoin(base_url, link['href'])
+    for link in select(soup, 'a[href]'):
+        if link.get_text(strip=True) in NEXT_TEXTS:
+            return urljoin(base_url, link['href'])
+    return None
+
+
+def guess_page_pattern(url):
+    """
+    '...?page=2' のようなURLから、ページ番号の部分を {page} にしたURLとその番号を返す
+
+    ページ番号が見つからなければNoneを返す
+    """
+    for pattern in _PAGE_NUMBER_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            start, end = match.span(1)
+            return url[:start] + PAGE_PLACEHOLDER + url[end:], int(match.group(1))
+    return None
+
+
+def page_url(pattern, page):
+    """パターンの {page} をページ番号に置き換える"""
+    return pattern.replace(PAGE_PLACEHOLDER, str(page))
+
+
+def page_urls(pattern, start=1, end=None):
+    """startページからendページまで（endがNoneなら終わりなし）のURLを順に返す"""
+    pages = itertools.count(start) if end is None else range(start, end + 1)
+    for page in pages:
+        yield page_url(pattern, page)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTMLパーサーの選択
+BeautifulSoupが内部で使うパーサー（ツリービルダー）を切り替えます。
+
+- lxml        : C言語で実装されていて高速（インストールされていれば既定で使う）
+- html.parser : Python標準。追加インストール不要だが遅い
+- html5lib    : ブラウザと同じ規則で解析する。最も正確だが最も遅い
+
+環境変数 SCRAPE_PARSER でパーサーを固定できます。
+    SCRAPE_PARSER=html.parser python table/scrape_table.py
+
+部分解析:
+各スクレイピング関数は @parses(SoupStrainer(...)) で必要な部分を宣言できます。
+strainer_for() でまとめると、宣言された部分だけのツリーが作られます。
+"""
+
+import importlib.util
+import os
+
+from bs4 import BeautifulSoup, UnicodeDammit
+from bs4.filter import ElementFilter
+
+PARSER_ENV = 'SCRAPE_PARSER'
+
+# 速さ優先で使う順番
+FAST_PARSERS = ['lxml', 'html.parser']
+
+# 正確さ優先のパーサー
+STRICT_PARSER = 'html5lib'
+
+# パーサー名と必要なモジュール
+_PARSER_MODULES = {
+    'lxml': 'lxml',
+    'html5lib': 'html5lib',
+    'html.parser': None,
+}
+
+
+def is_available(name):
+    """パーサーが使えるか（モジュールがインストールされているか）を返す"""
+    if name not in _PARSER_MODULES:
+        return False
+    module = _PARSER_MODULES[name]
+    return module is None or importlib.util.find_spec(module) is not None
+
+
+def available_parsers():
+    """使えるパーサーの一覧を返す"""
+    return [name for name in _PARSER_MODULES if is_available(name)]
+
+
+def choose_parser(strict=False):
+    """
+    使うパーサーの名前を返す
+
+    strict: Trueならブラウザと同じ解析結果を優先してhtml5libを使う
+    """
+    name = os.environ.get(PARSER_ENV)
+    if name:
+        if not is_available(name):
+            raise ValueError(f"{PARSER_ENV}に指定したパーサーが使えません: {name}")
+        return name
+    if strict and is_available(STRICT_PARSER):
+        return STRICT_PARSER
+    return next(name for name in FAST_PARSERS if is_available(name))
+
+
+def has_class(name):
+    """
+    class属性に name が含まれるかを調べる関数を返す（SoupStrainer の class_ に渡す）
+
+    部分解析では class 属性が分割前の文字列のまま比べられるので、
+    class_='a' だと class="a b" の要素に一致しない。空白で分けてから比べる
+    """
+    def match(value):
+        if not value:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return name in classes
+    return match
+
+
+class StrainerUnion(ElementFilter):
+    """複数のSoupStrainerのどれかに一致する部分だけを解析するフィルター"""
+
+    def __init__(self, strainers):
+        self.strainers = list(strainers)
+        super().__init__(lambda element: any(s.match(element) for s in self.strainers))
+
+    @property
+    def excludes_everything(self):
+        return all(s.excludes_everything for s in self.strainers)
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return any(s.allow_tag_creation(nsprefix, name, attrs) for s in self.strainers)
+
+    def allow_string_creation(self, string):
+        return any(s.allow_string_creation(string) for s in self.strainers)
+
+
+def parses(*strainers):
+    """スクレイピング関数が必要とする部分（SoupStrainer）を登録するデコレーター"""
+    def decorator(func):
+        func.parse_only = strainers
+        return func
+    return decorator
+
+
+def strainer_for(funcs):
+    """
+    関数の一覧が必要とする部分をまとめたフィルターを返す
+
+    1つでも宣言のない関数があれば文書全体が必要なのでNoneを返す
+    """
+    strainers = []
+    for func in funcs:
+        needed = getattr(func, 'parse_only', None)
+        if needed is None:
+            return None
+        strainers.extend(needed)
+    return StrainerUnion(strainers) if strainers else None
+
+
+def make_soup(markup, parser=None, strict=False, parse_only=None):
+    """
+    選んだパーサーでBeautifulSoupオブジェクトを作る
+
+    parse_only: 指定した部分だけを解析する（strainer_for()の戻り値など）
+    """
+    name = parser or choose_parser(strict)
+    if name == STRICT_PARSER:
+        # html5libは部分解析に対応していないので文書全体を解析する
+        parse_only = None
+        if isinstance(markup, bytes):
+            # html5libは文字コードの指定がないとwindows-1252として読むので、
+            # 他のパーサーと同じ方法で先に文字コードを判定しておく
+            markup = UnicodeDammit(markup, is_html=True).unicode_markup
+    return BeautifulSoup(markup, name, parse_only=parse_only)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ホストごとの適応型レート制限と再試行
+サーバーの応答を見ながらリクエストの速さと同時接続数を自動で調整します。
+
+学習ポイント:
+- トークンバケット: 1秒あたりのリクエスト数を一定以下に保つ
+- AIMD: 成功したら少しずつ増やし、429/503が返ったら半分に減らす
+- 指数バックオフ + ジッター: 再試行の間隔を倍々に広げ、ランダムにずらす
+- Retry-Afterヘッダーがあればサーバーの指示どおりに待つ
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+
+# 再試行の対象にするステータスコード（混雑・一時停止）
+RETRY_STATUSES = {429, 503}
+
+# 最大再試行回数
+MAX_RETRIES = 4
+
+# バックオフの基準秒数と上限秒数
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+# Retry-Afterで指示された待ち時間の上限秒数
+RETRY_AFTER_MAX = 120.0
+
+# 1秒あたりのリクエスト数（初期値・下限・上限・成功時の増加量）
+INITIAL_RATE = 5.0
+MIN_RATE = 0.5
+MAX_RATE = 50.0
+RATE_STEP = 0.5
+
+# 同時接続数（初期値・上限）
+INITIAL_CONCURRENCY = 4
+MAX_CONCURRENCY = 32
+
+
+class HostLimiter:
+    """1つのホストに対するトークンバケットとAIMDによる同時接続数の制御"""
+
+    def __init__(self):
+        self.rate = INITIAL_RATE
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.limit = float(INITIAL_CONCURRENCY)
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def _refill(self):
+        """経過時間に応じてトークンを補充する（最大で1秒分）"""
+        now = time.monotonic()
+        self.tokens = min(max(1.0, self.rate), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """
+        同時接続数の空きとトークンができるまで待つ
+
+        空きを確保する（in_flight を増やす）のは戻る直前だけなので、
+        待っている間に例外が起きても枠が減ったままにならない
+        """
+        with self.condition:
+            while True:
+                if self.in_flight >= int(self.limit):
+                    self.condition.wait()
+                    continue
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    return
+                self.condition.wait((1 - self.tokens) / self.rate)
+
+    def release(self, throttled):
+        """結果に応じて速さと同時接続数を調整する"""
+        with self.condition:
+            self.in_flight -= 1
+            if throttled:
+                # 乗算的に減らす（Multiplicative Decrease）
+                self.limit = max(1.0, self.limit / 2)
+                self.rate = max(MIN_RATE, self.rate / 2)
+            else:
+                # 加算的に増やす（Additive Increase）: 約1往復ごとに+1
+                self.limit = min(float(MAX_CONCURRENCY), self.limit + 1 / self.limit)
+                self.rate = min(MAX_RATE, self.rate + RATE_STEP)
+            self.condition.notify_all()
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(url):
+    """URLのホストに対応するリミッターを返す"""
+    host = urlsplit(url).netloc
+    with _limiters_lock:
+        if host not in _limiters:
+            _limiters[host] = HostLimiter()
+        return _limiters[host]
+
+
+def parse_retry_after(value):
+    """Retry-Afterヘッダー（秒数または日時）を待ち秒数に変換する"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt):
+    """指数バックオフにフルジッターを加えた待ち秒数を返す"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def send_with_retry(send, url, max_retries=MAX_RETRIES):
+    """
+    レート制限を守りながらリクエストを送り、必要なら再試行する
+
+    send: リクエストを1回送ってレスポンスを返す関数
+    """
+    limiter = get_limiter(url)
+    for attempt in range(max_retries + 1):
+        limiter.acquire()
+        # どんな例外でも必ず release() する（しないと枠が戻らず、そのホストへの以降のリクエストが止まる）
+        throttled = False
+        error = None
+        try:
+            response = send()
+            throttled = response.status_code in RETRY_STATUSES
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            # 接続できない・応答がないのは混雑の合図として扱い、再試行する
+            throttled = True
+            error = e
+        finally:
+            # InvalidURL など再試行しない例外は、混雑とはみなさずにそのまま呼び出し元へ
+            limiter.release(throttled)
+
+        if error is not None:
+            if attempt == max_retries:
+                raise error
+            delay = backoff_delay(attempt)
+            print(f"  ⚠ 接続エラーのため{delay:.1f}秒後に再試行します: {url} ({error})")
+            time.sleep(delay)
+            continue
+
+        if not throttled or attempt == max_retries:
+            return response
+
+        delay = parse_retry_after(response.headers.get('Retry-After'))
+        if delay is None:
+            delay = backoff_delay(attempt)
+        delay = min(delay, RETRY_AFTER_MAX)
+        print(f"  ⚠ {response.status_code}のため{delay:.1f}秒後に再試行します: {url}")
+        response.close()
+        time.sleep(delay)
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+保存済みデータからrequestsのレスポンスを組み立てる
+キャッシュや記録ファイルの本文を、通常の取得結果と同じように扱えるようにします。
+"""
+
+import io
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+
+def build_response(url, body, headers=None, status_code=200, reason='OK', request=None):
+    """本文とヘッダーからResponseオブジェクトを作る"""
+    response = requests.Response()
+    response.status_code = status_code
+    response.reason = reason
+    response.url = url
+    response.request = request
+    response.headers = CaseInsensitiveDict(headers or {})
+    response.encoding = get_encoding_from_headers(response.headers)
+    # 本文は読み込み済みとして扱う（iter_content()もこの本文から返される）
+    response.raw = io.BytesIO(body)
+    response._content = body
+    response._content_consumed = True
+    return response
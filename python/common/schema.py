@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+宣言的な抽出スキーマ
+「どの要素を1件のデータ（レコード）とし、その中のどこを項目として取り出すか」を
+辞書（JSON）で書き、文書を1回たどるだけで全スキーマの全項目を取り出します。
+
+学習ポイント:
+- 抽出方法をコードではなくデータとして書けば、新しいページにもコードを書かずに対応できる
+- セレクターは「いくつ目の段階まで一致したか」という状態で表せる
+- 親から受け継いだ状態を持ちながら文書を1回たどれば、全セレクターを同時に調べられる
+
+スキーマの書き方:
+    {
+        "name": "商品",
+        "records": "table#product-table tr",      # 1件のデータになる要素
+        "fields": {
+            "商品名": "td.product-name",           # 文字列ならテキストを取り出す
+            "価格": {"selector": "td.price", "type": "number"},
+            "リンク": {"selector": "a", "attr": "href"},
+            "必須": {"attr": "required", "type": "bool"},   # selectorなし → レコード自身
+            "選択肢": {"selector": "option", "all": true},   # allなら全部をリストで
+            "型番": {"selector": "td.code", "required": true}  # 見つからないレコードは除く
+        }
+    }
+
+セレクターは「タグ名#id.クラス[属性] [属性=値]」を空白（子孫）でつないだものに対応しています。
+
+使い方:
+    plan = compile_schemas([PRODUCT_SCHEMA, SALES_SCHEMA])
+    results = plan.run(soup)   # {スキーマ名: [レコードの辞書, ...]}
+"""
+
+import json
+import re
+
+from bs4 import Tag
+
+from common.columnar import parse_date, parse_number
+
+# 値の型と変換方法
+_CONVERTERS = {
+    'text': lambda value: value,
+    'number': lambda value: parse_number(value) if value is not None else None,
+    'date': lambda value: parse_date(value) if value is not None else None,
+    'bool': bool,
+}
+
+_COMPOUND_PATTERN = re.compile(r'(?P<tag>[\w-]+|\*)?(?P<rest>(?:#[\w-]+|\.[\w-]+|\[[^\]]+\])*)')
+_PART_PATTERN = re.compile(
+    r'#(?P<id>[\w-]+)|\.(?P<cls>[\w-]+)|\[\s*(?P<attr>[\w-]+)\s*(?:=\s*(?P<value>"[^"]*"|\'[^\']*\'|[^\]]*?)\s*)?\]')
+
+
+class SimpleSelector:
+    """1段分のセレクター（タグ名・id・クラス・属性）"""
+
+    def __init__(self, text):
+        match = _COMPOUND_PATTERN.fullmatch(text)
+        if not match or not text:
+            raise ValueError(f"対応していないセレクターです: {text}")
+        tag = match.group('tag')
+        self.tag = None if tag in (None, '*') else tag.lower()
+        self.id = None
+        self.classes = []
+        self.attrs = []   # (属性名, 値またはNone)
+        for part in _PART_PATTERN.finditer(match.group('rest')):
+            if part.group('id'):
+                self.id = part.group('id')
+            elif part.group('cls'):
+                self.classes.append(part.group('cls'))
+            else:
+                value = part.group('value')
+                if value is not None and value[:1] in ('"', "'"):
+                    value = value[1:-1]
+                self.attrs.append((part.group('attr'), value))
+
+    def matches(self, element):
+        if self.tag is not None and element.name != self.tag:
+            return False
+        if self.id is not None and element.get('id') != self.id:
+            return False
+        if self.classes:
+            classes = element.get('class', [])
+            if any(name not in classes for name in self.classes):
+                return False
+        for name, value in self.attrs:
+            if not element.has_attr(name):
+                return False
+            if value is not None:
+                actual = element[name]
+                if isinstance(actual, list):
+                    actual = ' '.join(actual)
+                if actual != value:
+                    return False
+        return True
+
+
+def parse_selector(selector):
+    """'div.menu li a' のようなセレクターを段階のリストにする"""
+    return [SimpleSelector(part) for part in selector.split()]
+
+
+class FieldPlan:
+    """1つの項目の取り出し方"""
+
+    def __init__(self, name, spec):
+        if isinstance(spec, str):
+            spec = {'selector': spec}
+        self.name = name
+        self.steps = parse_selector(spec.get('selector', ''))
+        self.attr = spec.get('attr')
+        self.type = spec.get('type', 'text')
+        self.all = bool(spec.get('all', False))
+        self.required = bool(spec.get('required', False))
+        if self.type not in _CONVERTERS:
+            raise ValueError(f"対応していない型です: {self.type}（項目: {name}）")
+
+    def value(self, element):
+        """要素から項目の値を取り出して型を変換する"""
+        if self.type == 'bool':
+            if self.attr:
+                return element.has_attr(self.attr)
+            return bool(element.get_text(strip=True))
+        if self.attr:
+            value = element.get(self.attr)
+            if isinstance(value, list):
+                value = ' '.join(value)
+        else:
+            value = element.get_text(strip=True)
+        return _CONVERTERS[self.type](value)
+
+    def capture(self, record, element):
+        """一致した要素の値をレコードに入れる（allでなければ最初の1つだけ）"""
+        if self.all:
+            record[self.name].append(self.value(element))
+        elif record[self.name] is None:
+            record[self.name] = self.value(element)
+
+
+class RecordPlan:
+    """1つのスキーマ（レコードの見つけ方と項目の一覧）"""
+
+    def __init__(self, spec):
+        if 'records' not in spec:
+            raise ValueError(f"スキーマに'records'がありません: {spec.get('name')}")
+        self.name = spec.get('name') or spec['records']
+        self.steps = parse_selector(spec['records'])
+        if not self.steps:
+            raise ValueError(f"'records'のセレクターが空です: {self.name}")
+        self.fields = [FieldPlan(name, field) for name, field in spec.get('fields', {}).items()]
+        # セレクターのある項目だけが子孫をたどって探す対象になる
+        self.nested_fields = [field for field in self.fields if field.steps]
+        self.required_fields = [field.name for field in self.fields if field.required]
+
+    def is_complete(self, record):
+        """必須の項目がすべて見つかったかを返す"""
+        return all(record[name] not in (None, []) for name in self.required_fields)
+
+    def start_record(self, element):
+        """レコードの要素が見つかったときに、空のレコードを作る"""
+        record = {}
+        for field in self.fields:
+            if not field.steps:
+                record[field.name] = field.value(element)
+            else:
+                record[field.name] = [] if field.all else None
+        return record
+
+
+class Plan:
+    """複数のスキーマをまとめた、1回の走査で実行できる抽出計画"""
+
+    def __init__(self, records):
+        self.records = records
+
+    def run(self, soup):
+        """文書を1回だけたどり、{スキーマ名: [レコード, ...]} を返す"""
+        results = {record.name: [] for record in self.records}
+        # 状態: (セレクターを持つもの, 一致済みの段数, 項目なら所属するレコード)
+        initial = [(record, 0, None) for record in self.records]
+        stack = [(child, initial) for child in reversed(_child_tags(soup))]
+        while stack:
+            element, states = stack.pop()
+            # 子孫セレクターなので、親の状態はそのまま子にも引き継ぐ
+            next_states = list(states)
+            seen = None
+            for matcher, step, owner in states:
+                if not matcher.steps[step].matches(element):
+                    continue
+                if step + 1 < len(matcher.steps):
+                    # 同じ状態が重複すると同じ要素を2回取り出すので、1つだけにする
+                    if seen is None:
+                        seen = {_state_key(state) for state in states}
+                    state = (matcher, step + 1, owner)
+                    if _state_key(state) not in seen:
+                        seen.add(_state_key(state))
+                        next_states.append(state)
+                elif owner is None:
+                    # レコードが見つかったら、その内側で項目を探し始める
+                    record = matcher.start_record(element)
+                    results[matcher.name].append(record)
+                    next_states.extend((field, 0, record) for field in matcher.nested_fields)
+                else:
+                    matcher.capture(owner, element)
+            for child in reversed(_child_tags(element)):
+                stack.append((child, next_states))
+
+        for record_plan in self.records:
+            if record_plan.required_fields:
+                results[record_plan.name] = [record for record in results[record_plan.name]
+                                             if record_plan.is_complete(record)]
+        return results
+
+
+def _state_key(state):
+    """状態を比べるためのキー（レコードは中身ではなく同じものかで比べる）"""
+    matcher, step, owner = state
+    return id(matcher), step, id(owner)
+
+
+def _child_tags(element):
+    return [child for child in element.contents if isinstance(child, Tag)]
+
+
+def compile_schemas(specs):
+    """スキーマ（辞書）のリストを1つの抽出計画にまとめる"""
+    return Plan([RecordPlan(spec) for spec in specs])
+
+
+def load_schema_file(path):
+    """
+    スキーマのJSONファイルを読み込む
+
+    形式: {"url": "対象ページのURL", "schemas": [スキーマ, ...]}
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if 'schemas' not in data:
+        raise ValueError(f"'schemas'がありません: {path}")
+    return data
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CSSセレクターによる検索（コンパイル済みセレクターのキャッシュ付き）
+'table#product-table td.price' のようなCSSセレクターで要素を探します。
+セレクターの文字列は最初の1回だけ解析（コンパイル）し、以降は同じものを使い回します。
+
+学習ポイント:
+- soup.select() は呼ぶたびにセレクターの文字列を解析し直す
+- soupsieve.compile() で一度コンパイルしておけば、何ページでも再利用できる
+- functools.lru_cache で「最近使ったものを決まった数だけ」覚えておける
+
+使い方:
+    rows = select(soup, 'table#product-table tr')
+    price = select_one(row, 'td.price')
+    texts = select_text(soup, 'ul.menu > li')
+"""
+
+import functools
+
+import soupsieve
+
+# 覚えておくコンパイル済みセレクターの数
+SELECTOR_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=SELECTOR_CACHE_SIZE)
+def compile_selector(selector):
+    """セレクターをコンパイルして返す（同じ文字列なら前回の結果を返す）"""
+    return soupsieve.compile(selector)
+
+
+def select(element, selector, limit=0):
+    """セレクターに一致する要素をすべて返す（limitを指定するとその数まで）"""
+    return compile_selector(selector).select(element, limit=limit)
+
+
+def select_one(element, selector):
+    """セレクターに一致する最初の要素を返す（なければNone）"""
+    return compile_selector(selector).select_one(element)
+
+
+def select_text(element, selector):
+    """セレクターに一致する要素のテキスト（前後の空白を除く）をリストで返す"""
+    return [match.get_text(strip=True) for match in compile_selector(selector).iselect(element)]
+
+
+def cache_info():
+    """キャッシュの状況（ヒット数・ミス数・件数）を返す"""
+    return compile_selector.cache_info()
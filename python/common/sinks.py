@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+出力先（シンク）
+スクレイピングしたレコードを、見つけたそばから1件ずつファイルへ書き出します。
+全件をリストにためてから保存しないので、件数が増えてもメモリ使用量は一定です。
+
+- CsvSink        : CSV（.csv）
+- CsvSink + gzip : gzip圧縮したCSV（.csv.gz）
+- JsonLinesSink  : 1行に1件のJSON（.jsonl / .jsonl.gz）
+- SqliteSink     : SQLiteのデータベース（.sqlite / .db）。IDが同じ行は更新する
+
+書き出しはまとめて行い、たまった量（FLUSH_BYTES）か経過時間（FLUSH_SECONDS）で
+ファイルに反映します。経過時間は別のスレッドでも確かめるので、次のレコードが
+なかなか来ない（取得が止まっている）間も、書いた分は FLUSH_SECONDS 以内に反映されます。
+行の途中で反映されることはないので、実行中のファイルを tail -f などで読んでも
+壊れた行は見えません。gzip（.gz）の場合は、反映した分までを zcat などで展開できますが、
+ファイルの終わりの情報（トレーラー）は閉じるときに書くので、Python の gzip モジュールでは
+閉じるまで読めません（EOFError になります）。
+
+環境変数 SCRAPE_OUTPUT_FORMAT で、output_path() が作るファイルの形式を変更できます。
+    SCRAPE_OUTPUT_FORMAT=jsonl python basic/scrape_images.py
+
+学習ポイント:
+- with文でファイルを開き、終わったら必ず閉じる（close）
+- 少量ずつ書くより、ある程度まとめて書くほうが速い（バッファリング）
+- 拡張子で形式を選ぶと、呼び出し側は形式を気にせずレコードを渡すだけでよい
+- SQLiteは executemany() で何件もまとめて1回のトランザクションで書くと速い
+- 複数のスレッドが同じバッファを触るときは Lock で順番に使う
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+FORMAT_ENV = 'SCRAPE_OUTPUT_FORMAT'
+FORMATS = ('csv', 'csv.gz', 'jsonl', 'jsonl.gz', 'sqlite')
+SQLITE_SUFFIXES = ('.sqlite', '.sqlite3', '.db')
+
+# これだけたまったらファイルに反映する（文字数）
+FLUSH_BYTES = 64 * 1024
+
+# 前回の反映からこれだけ経ったらファイルに反映する（秒）
+FLUSH_SECONDS = 1.0
+
+# SQLiteに1回でまとめて書き込む行数
+BATCH_SIZE = 1000
+
+
+class Sink:
+    """レコードを1件ずつ受け取り、まとめてファイルに書き出す出力先"""
+
+    def __init__(self, path, flush_bytes=FLUSH_BYTES, flush_seconds=FLUSH_SECONDS, append=False):
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.flush_seconds = flush_seconds
+        self.append = append
+        self.count = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        # 追記する場合、すでに中身があればヘッダーは書かない
+        self._is_new = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._open()
+        # 次のレコードが来なくても、時間が経てば反映する
+        self._timer = None
+        if flush_seconds and flush_seconds > 0:
+            self._timer = threading.Thread(target=self._flush_periodically, daemon=True)
+            self._timer.start()
+
+    def _flush_periodically(self):
+        """flush_seconds ごとに、たまっている分をファイルに反映する（別スレッド）"""
+        while not self._closed.wait(self.flush_seconds):
+            with self._lock:
+                if not self._closed.is_set() and self._has_pending():
+                    self._flush()
+
+    def _open(self):
+        """出力先のファイルを開く（append=Trueなら末尾に追記する）"""
+        self._buffer = io.StringIO()
+        mode = 'a' if self.append else 'w'
+        self._gzip = None
+        if self.path.endswith('.gz'):
+            # 反映するときに圧縮の区切りを入れるため、GzipFile を手元に持っておく
+            self._gzip = gzip.open(self.path, mode + 'b')
+            self._file = io.TextIOWrapper(self._gzip, encoding='utf-8', newline='')
+        else:
+            self._file = open(self.path, mode, encoding='utf-8', newline='')
+
+    def _encode(self, record):
+        """1件分をバッファに書き込む（形式ごとに実装する）"""
+        raise NotImplementedError
+
+    def _is_full(self):
+        """バッファが反映する量までたまったかを返す"""
+        return self._buffer.tell() >= self.flush_bytes
+
+    def _has_pending(self):
+        """まだファイルに反映していない分があるかを返す"""
+        return self._buffer.tell() > 0
+
+    def write(self, record):
+        """1件書き込む"""
+        with self._lock:
+            self._encode(record)
+            self.count += 1
+            if self._is_full() or time.monotonic() - self._last_flush >= self.flush_seconds:
+                self._flush()
+
+    def write_many(self, records):
+        """複数件をまとめて書き込む"""
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """たまっている分をファイルに反映する"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        data = self._buffer.getvalue()
+        if data:
+            self._file.write(data)
+            self._buffer.seek(0)
+            self._buffer.truncate()
+        self._file.flush()
+        if self._gzip is not None:
+            # 圧縮の区切り（Z_SYNC_FLUSH）を入れ、ここまでの分を zcat などで展開できるようにする
+            # （トレーラーは閉じるときに書くので、Python の gzip モジュールでは閉じるまで読めない）
+            self._gzip.flush(zlib.Z_SYNC_FLUSH)
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self._closed.set()
+        if self._timer is not None and self._timer is not threading.current_thread():
+            self._timer.join()
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._file.closed:
+            return
+        self._flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CsvSink(Sink):
+    """
+    CSVの出力先（パスが .gz で終わればgzip圧縮する）
+
+    fieldnames: 列名。辞書のレコードはこの順に並べる。
+                省略した場合は最初の辞書のキーを列名にする（リストのレコードなら列名なし）
+    """
+
+    def __init__(self, path, fieldnames=None, **kwargs):
+        super().__init__(path, **kwargs)
+        self.fieldnames = list(fieldnames) if fieldnames is not None else None
+        self._writer = csv.writer(self._buffer)
+        if self.fieldnames is not None and self._is_new:
+            self._writer.writerow(self.fieldnames)
+
+    def _encode(self, record):
+        if isinstance(record, dict):
+            if self.fieldnames is None:
+                self.fieldnames = list(record)
+                if self._is_new:
+                    self._writer.writerow(self.fieldnames)
+            record = [record.get(name, '') for name in self.fieldnames]
+        self._writer.writerow(record)
+
+
+class JsonLinesSink(Sink):
+    """1行に1件のJSONを書く出力先（パスが .gz で終わればgzip圧縮する）"""
+
+    def __init__(self, path, fieldnames=None, **kwargs):
+        super().__init__(path, **kwargs)
+        self.fieldnames = list(fieldnames) if fieldnames is not None else None
+
+    def _encode(self, record):
+        if not isinstance(record, dict) and self.fieldnames is not None:
+            # リストのレコードは列名と組み合わせて辞書にする
+            record = dict(zip(self.fieldnames, record))
+        # 日付などJSONにない型は文字列にする
+        self._buffer.write(json.dumps(record, ensure_ascii=False, default=str))
+        self._buffer.write('\n')
+
+
+class SqliteSink(Sink):
+    """
+    SQLiteの出力先（.sqlite / .db）
+
+    レコードはBATCH_SIZE件ずつまとめて executemany() で書き込みます。
+    key に自然なID（ニュースIDや商品名など）の列を指定すると、同じIDの行は
+    追加ではなく更新（upsert）になるので、定期的に実行しても行が重複しません。
+
+    fieldnames: 列名（省略した場合は最初の辞書のキーを列名にする）
+    key: IDになる列名（複数ならリスト）。省略すると毎回追加する
+    table: テーブル名（省略した場合はファイル名から決める）
+    append: SQLiteでは常に既存のテーブルに追加・更新する（他の出力先と呼び方を合わせるための引数）
+    """
+
+    def __init__(self, path, fieldnames=None, key=None, table=None,
+                 batch_size=BATCH_SIZE, flush_seconds=FLUSH_SECONDS, append=True):
+        self.table = table or os.path.basename(path).split('.')[0]
+        self.fieldnames = list(fieldnames) if fieldnames is not None else None
+        self.key = [key] if isinstance(key, str) else list(key or [])
+        self._sql = None
+        super().__init__(path, flush_bytes=batch_size, flush_seconds=flush_seconds)
+
+    def _open(self):
+        self._rows = []
+        # 時間での反映は別のスレッドから行うので、接続を複数のスレッドで使えるようにする
+        # （同時に使わないよう Sink のロックで順番にしている）
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        # WALモードなら、書き込み中でも他のプログラムから読める
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        if self.fieldnames is not None:
+            self._prepare()
+
+    def _prepare(self):
+        """テーブル・足りない列・IDの索引を作り、書き込み用のSQLを組み立てる"""
+        table = _quote(self.table)
+        columns = ', '.join(_quote(name) for name in self.fieldnames)
+        with self._conn:
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ({columns})')
+            existing = {row[1] for row in self._conn.execute(f'PRAGMA table_info({table})')}
+            for name in self.fieldnames:
+                if name not in existing:
+                    self._conn.execute(f'ALTER TABLE {table} ADD COLUMN {_quote(name)}')
+            if self.key:
+                keys = ', '.join(_quote(name) for name in self.key)
+                index = _quote(f'{self.table}_key')
+                self._conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS {index} ON {table} ({keys})')
+
+        placeholders = ', '.join('?' for _ in self.fieldnames)
+        sql = f'INSERT INTO {table} ({columns}) VALUES ({placeholders})'
+        if self.key:
+            keys = ', '.join(_quote(name) for name in self.key)
+            updates = [f'{_quote(name)} = excluded.{_quote(name)}'
+                       for name in self.fieldnames if name not in self.key]
+            if updates:
+                sql += f' ON CONFLICT ({keys}) DO UPDATE SET ' + ', '.join(updates)
+            else:
+                sql += f' ON CONFLICT ({keys}) DO NOTHING'
+        self._sql = sql
+
+    def _encode(self, record):
+        if isinstance(record, dict):
+            if self.fieldnames is None:
+                self.fieldnames = list(record)
+            if self._sql is None:
+                self._prepare()
+            record = [record.get(name) for name in self.fieldnames]
+        elif self._sql is None:
+            raise ValueError("リストのレコードを書き込むには fieldnames が必要です")
+        self._rows.append(tuple(_to_sql_value(value) for value in record))
+
+    def _is_full(self):
+        # SQLiteでは flush_bytes を行数（batch_size）として使う
+        return len(self._rows) >= self.flush_bytes
+
+    def _has_pending(self):
+        return bool(self._rows)
+
+    def _flush(self):
+        """たまっている行を1回のトランザクションでまとめて書き込む"""
+        if self._rows:
+            with self._conn:
+                self._conn.executemany(self._sql, self._rows)
+            self._rows = []
+        self._last_flush = time.monotonic()
+
+    def _close(self):
+        if self._conn is None:
+            return
+        self._flush()
+        self._conn.close()
+        self._conn = None
+
+
+def _quote(name):
+    """テーブル名・列名をSQLで使えるように "" で囲む"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _to_sql_value(value):
+    """SQLiteに保存できない値（リストや日付など）を文字列にする"""
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return value
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return str(value)
+
+
+def get_format(default='csv'):
+    """出力形式を返す（環境変数 SCRAPE_OUTPUT_FORMAT があればそちらを使う）"""
+    name = os.environ.get(FORMAT_ENV, '').strip().lower() or default
+    if name not in FORMATS:
+        raise ValueError(f"{FORMAT_ENV}には{', '.join(FORMATS)}のどれかを指定してください: {name}")
+    return name
+
+
+def output_path(folder, name, default_format='csv'):
+    """フォルダとファイル名（拡張子なし）から、出力形式に合わせたパスを作る"""
+    return os.path.join(folder, f"{name}.{get_format(default_format)}")
+
+
+def open_sink(path, fieldnames=None, key=None, **kwargs):
+    """
+    パスの拡張子に合った出力先を開く
+
+    key: SQLiteの場合に、同じ行かどうかを判定するIDの列名（CSV・JSON Linesでは使わない）
+    """
+    if path.endswith(SQLITE_SUFFIXES):
+        return SqliteSink(path, fieldnames, key=key, **kwargs)
+    if path.endswith(('.jsonl', '.jsonl.gz')):
+        return JsonLinesSink(path, fieldnames, **kwargs)
+    if path.endswith(('.csv', '.csv.gz')):
+        return CsvSink(path, fieldnames, **kwargs)
+    raise ValueError(f"対応していない出力形式です: {path}")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ストリーミングでのテーブル行の取り出し
+ページ全体のツリーを作らずに、HTTPで届いたそばから指定したテーブルの行を取り出します。
+何十万行もある巨大なテーブルでも、メモリ使用量はほぼ一定です。
+
+学習ポイント:
+- html.parser.HTMLParser は feed() で少しずつHTMLを渡せる（逐次トークン化）
+- タグの開始・終了・テキストごとに呼ばれるメソッドで必要な部分だけを記録する
+- 取り出した行はすぐに呼び出し元へ渡し、手元には残さない
+"""
+
+import codecs
+from collections import deque
+from html.parser import HTMLParser
+
+from common import http_client
+
+# 1回に読み込むバイト数
+CHUNK_SIZE = 64 * 1024
+
+
+class TableRowParser(HTMLParser):
+    """
+    指定したidのテーブルの行を、見つけた順にためておくパーサー
+
+    tables: {テーブルid: セルとして読むタグ} の辞書
+            （idのリストを渡した場合はtdだけを読む）
+    """
+
+    def __init__(self, tables, skip_header=True):
+        super().__init__(convert_charrefs=True)
+        if not isinstance(tables, dict):
+            tables = {table_id: ('td',) for table_id in tables}
+        self.tables = tables
+        self.table_ids = set(tables)
+        self.skip_header = skip_header
+        self.rows = deque()
+        self.finished = set()
+        self._tables = []     # 開いているtableの [id, 行数]（入れ子に対応）
+        self._row = None
+        self._cell = None
+
+    def _current_table(self):
+        """今いる一番内側のテーブルが対象ならそのidを返す"""
+        if self._tables and self._tables[-1][0] in self.table_ids:
+            return self._tables[-1][0]
+        return None
+
+    def _close_cell(self):
+        if self._cell is not None:
+            # get_text(strip=True) と同じく、テキストごとに前後の空白を除いてつなげる
+            self._row.append(''.join(self._cell))
+            self._cell = None
+
+    def _close_row(self):
+        self._close_cell()
+        if self._row is not None:
+            self._tables[-1][1] += 1
+            if not (self.skip_header and self._tables[-1][1] == 1):
+                self.rows.append((self._current_table(), self._row))
+            self._row = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'table':
+            self._close_row()
+            self._tables.append([dict(attrs).get('id'), 0])
+        elif self._current_table() is None:
+            return
+        elif tag == 'tr':
+            # 閉じタグが省略されていても前の行を確定させる
+            self._close_row()
+            self._row = []
+        elif tag in self.tables[self._current_table()] and self._row is not None:
+            self._close_cell()
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if tag == 'table' and self._tables:
+            self._close_row()
+            table_id, _ = self._tables.pop()
+            if table_id in self.table_ids:
+                self.finished.add(table_id)
+        elif self._current_table() is None:
+            return
+        elif tag == 'tr':
+            self._close_row()
+        elif tag in self.tables[self._current_table()]:
+            self._close_cell()
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            text = data.strip()
+            if text:
+                self._cell.append(text)
+
+
+def iter_table_rows(chunks, tables, encoding='utf-8', skip_header=True):
+    """
+    HTMLのバイト列を少しずつ受け取り、(テーブルid, セルのリスト) を順に返す
+
+    skip_header: Trueならヘッダー行（各テーブルの最初の行）は含まない
+    対象のテーブルをすべて読み終えたら、残りの本文は読まずに終了する
+    """
+    parser = TableRowParser(tables, skip_header)
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    for chunk in chunks:
+        parser.feed(decoder.decode(chunk))
+        while parser.rows:
+            yield parser.rows.popleft()
+        if parser.finished >= parser.table_ids:
+            return
+    parser.feed(decoder.decode(b'', final=True))
+    parser.close()
+    while parser.rows:
+        yield parser.rows.popleft()
+
+
+def stream_table_rows(url, tables, chunk_size=CHUNK_SIZE, skip_header=True):
+    """ページを少しずつダウンロードしながらテーブルの行を順に返す"""
+    with http_client.fetch(url, stream=True) as response:
+        # 文字コードの指定がなければUTF-8として読む
+        content_type = response.headers.get('Content-Type', '').lower()
+        encoding = response.encoding if 'charset' in content_type else 'utf-8'
+        yield from iter_table_rows(response.iter_content(chunk_size), tables, encoding,
+                                   skip_header)
@@ -8,6 +8,11 @@
 3. リアルタイムで更新される要素を監視
 4. ユーザーインタラクションをシミュレート
 5. 取得したデータをCSVとJSONで保存
+6. フェーズごとに結果を保存し、途中で止まっても続きから再実行できる
+
+実行方法（pythonフォルダで実行）:
+    python dynamic/scrape_dynamic.py            # 前回止まったフェーズから再開
+    python dynamic/scrape_dynamic.py --restart  # 最初からやり直す
 """
 
 from selenium import webdriver
@@ -16,12 +21,34 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
+import argparse
 import time
 import json
-import csv
 import os
+import sys
 from datetime import datetime
 
+# python/ フォルダを検索パスに追加して共通モジュールを読み込む
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import delta, sinks
+from common.checkpoint import PhaseCheckpoint
+
+# 対象ページ
+TARGET_URL = "https://scraping-practice-six.vercel.app/dynamic"
+
+# フェーズごとの結果（チェックポイント）を保存するフォルダ
+CHECKPOINT_FOLDER = os.path.join("output", "dynamic")
+
+# 実行するフェーズ（保存するファイル名, 表示名, 実行する関数）
+# 関数はこの後で定義するので、lambda で呼び出すときに名前を引く
+PHASES = [
+    ("realtime", "時刻データ", lambda driver: scrape_realtime_content(driver)),
+    ("counter", "カウンター操作", lambda driver: interact_with_counter(driver)),
+    ("list", "リスト操作", lambda driver: manipulate_dynamic_list(driver)),
+    ("news", "ニュースデータ", lambda driver: scrape_async_news(driver)),
+    ("visibility", "表示制御テスト", lambda driver: test_conditional_visibility(driver)),
+]
+
 def setup_driver():
     """Chrome WebDriverを設定して返す"""
     print("🔧 WebDriverを設定中...")
@@ -366,8 +393,12 @@ def test_conditional_visibility(driver):
         return []
 
 def save_data_to_files(time_data, counter_data, list_data, news_data, visibility_data):
-    """収集したデータをファイルに保存"""
+    """
+    収集したデータをファイルに保存
+    戻り値: すべてのファイルを保存できればTrue（1つでも失敗すればFalse）
+    """
     print("\n💾 データを保存中...")
+    saved = True
     
     # output フォルダを作成
     output_folder = "output"
@@ -379,7 +410,7 @@ def save_data_to_files(time_data, counter_data, list_data, news_data, visibility
     all_data = {
         "スクレイピング情報": {
             "実行日時": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "対象URL": "https://scraping-practice-six.vercel.app/dynamic",
+            "対象URL": TARGET_URL,
             "使用ツール": "Selenium WebDriver"
         },
         "リアルタイム時刻データ": time_data,
@@ -396,82 +427,141 @@ def save_data_to_files(time_data, counter_data, list_data, news_data, visibility
         print(f"✓ JSONファイル保存: {json_filename}")
     except Exception as e:
         print(f"✗ JSON保存エラー: {e}")
+        saved = False
     
     # CSVファイルとして保存（カウンターデータを例として）
-    csv_filename = os.path.join(output_folder, "counter_operations.csv")
+    # 列名は最初のレコードのキーから決まる（SCRAPE_OUTPUT_FORMAT=jsonl ならJSON Lines）
+    csv_filename = sinks.output_path(output_folder, "counter_operations")
     try:
-        with open(csv_filename, 'w', newline='', encoding='utf-8') as f:
-            if counter_data:
-                writer = csv.DictWriter(f, fieldnames=counter_data[0].keys())
-                writer.writeheader()
-                writer.writerows(counter_data)
+        with sinks.open_sink(csv_filename) as sink:
+            sink.write_many(counter_data)
         print(f"✓ CSVファイル保存: {csv_filename}")
     except Exception as e:
         print(f"✗ CSV保存エラー: {e}")
+        saved = False
     
     # ニュースデータもCSVで保存
-    news_csv_filename = os.path.join(output_folder, "news_data.csv")
+    news_csv_filename = sinks.output_path(output_folder, "news_data")
     try:
-        with open(news_csv_filename, 'w', newline='', encoding='utf-8') as f:
-            if news_data:
-                writer = csv.DictWriter(f, fieldnames=news_data[0].keys())
-                writer.writeheader()
-                writer.writerows(news_data)
+        # SQLiteに保存する場合は、ニュースID（data-news-id）が同じ行を更新する
+        with sinks.open_sink(news_csv_filename, key="ニュースID") as sink:
+            sink.write_many(news_data)
         print(f"✓ ニュースCSVファイル保存: {news_csv_filename}")
     except Exception as e:
         print(f"✗ ニュースCSV保存エラー: {e}")
+        saved = False
+    
+    # 前回の実行から追加・更新・削除されたニュースだけを別に保存（差分）
+    # 取得に失敗して0件のときに「全件削除」と判定しないよう、1件以上あるときだけ比べる
+    # 差分は比べた状態を保存するので最後に行い、ほかの保存に失敗したときは行わない
+    # （チェックポイントが残るので、再実行したときに同じ差分をもう一度出力できる）
+    if not saved:
+        print("⚠ 保存に失敗したファイルがあるため、ニュースの差分は次回の実行で出力します")
+    elif news_data:
+        news_delta_filename = sinks.output_path(output_folder, "news_delta")
+        try:
+            tracker = delta.DeltaTracker("news", key="ニュースID")
+            with sinks.open_sink(news_delta_filename) as sink, delta.open_change_log() as change_log:
+                counts = delta.write_changes(tracker, news_data, sink, change_log)
+            summary = " / ".join(f"{change}: {count}件" for change, count in counts.items())
+            print(f"✓ ニュースの差分を保存: {news_delta_filename} ({summary})")
+        except Exception as e:
+            print(f"✗ ニュース差分の保存エラー: {e}")
+            saved = False
+    return saved
+
+def open_target_page(driver):
+    """対象ページにアクセスし、読み込みが終わるまで待つ"""
+    print(f"🌐 ページにアクセス中: {TARGET_URL}")
+    driver.get(TARGET_URL)
+    
+    # ページが完全に読み込まれるまで待機
+    WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.TAG_NAME, "body"))
+    )
+    print("✓ ページ読み込み完了")
+
+def run_phases(checkpoint):
+    """
+    各フェーズを順に実行し、終わるたびに結果を保存する
+    保存済みのフェーズは実行せず、前回の結果を読み込む
+    戻り値: {フェーズ名: レコードのリスト}（WebDriverを用意できなければNone）
+    """
+    results = {}
+    driver = None
+    try:
+        for name, label, func in PHASES:
+            if checkpoint.is_done(name):
+                results[name] = checkpoint.load(name)
+                print(f"\n⏭ {label}: 前回の結果を使用します ({len(results[name])}件)")
+                continue
+            
+            # 実行するフェーズが残っているときだけブラウザを起動する
+            if driver is None:
+                driver = setup_driver()
+                if not driver:
+                    return None
+                open_target_page(driver)
+            
+            records = func(driver)
+            if records:
+                path = checkpoint.save(name, records)
+                print(f"✓ {label}を保存: {path}")
+            else:
+                # 取得に失敗した可能性があるので、0件は完了扱いにしない
+                print(f"⚠ {label}: 0件のため保存しません（次回もう一度実行します）")
+            results[name] = records
+    finally:
+        if driver is not None:
+            # ブラウザを閉じる
+            print("🔄 ブラウザを閉じています...")
+            driver.quit()
+            print("✓ クリーンアップ完了")
+    return results
 
 def main():
     """メイン実行関数"""
+    arg_parser = argparse.ArgumentParser(description="動的コンテンツのスクレイピング")
+    arg_parser.add_argument('--restart', action='store_true',
+                            help="前回の途中結果を使わず、最初のフェーズから実行する")
+    args = arg_parser.parse_args()
+    
     print("🚀 動的コンテンツスクレイピング開始")
     print("=" * 60)
     
-    # WebDriverを設定
-    driver = setup_driver()
-    if not driver:
-        return
+    checkpoint = PhaseCheckpoint(CHECKPOINT_FOLDER)
+    if args.restart:
+        checkpoint.clear()
     
     try:
-        # 対象ページにアクセス
-        url = "https://scraping-practice-six.vercel.app/dynamic"
-        print(f"🌐 ページにアクセス中: {url}")
-        driver.get(url)
-        
-        # ページが完全に読み込まれるまで待機
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
-        print("✓ ページ読み込み完了")
-        
-        # 各種スクレイピング実行
-        time_data = scrape_realtime_content(driver)
-        counter_data = interact_with_counter(driver)
-        list_data = manipulate_dynamic_list(driver)
-        news_data = scrape_async_news(driver)
-        visibility_data = test_conditional_visibility(driver)
+        # 各種スクレイピング実行（フェーズごとに保存）
+        results = run_phases(checkpoint)
+        if results is None:
+            return
         
         # データを保存
-        save_data_to_files(time_data, counter_data, list_data, news_data, visibility_data)
+        saved = save_data_to_files(results["realtime"], results["counter"], results["list"],
+                                   results["news"], results["visibility"])
+        
+        if saved:
+            # 全フェーズの出力が終わったので、次回は最初から取得する
+            checkpoint.clear()
+        else:
+            # 保存に失敗したファイルがあるので、フェーズの結果は消さずに残す
+            print(f"⚠ 保存に失敗したファイルがあります。フェーズの結果は {CHECKPOINT_FOLDER} に残しました"
+                  "（再実行すると保存からやり直します）")
         
         # 結果表示
         print("\n" + "=" * 60)
         print("🎉 動的コンテンツスクレイピング完了")
         print("=" * 60)
-        print(f"時刻データ: {len(time_data)}件")
-        print(f"カウンター操作: {len(counter_data)}件")
-        print(f"リスト操作: {len(list_data)}件")
-        print(f"ニュースデータ: {len(news_data)}件")
-        print(f"表示制御テスト: {len(visibility_data)}件")
+        for name, label, _ in PHASES:
+            print(f"{label}: {len(results[name])}件")
         print("=" * 60)
         
     except Exception as e:
         print(f"✗ メイン処理エラー: {e}")
-    
-    finally:
-        # ブラウザを閉じる
-        print("🔄 ブラウザを閉じています...")
-        driver.quit()
-        print("✓ クリーンアップ完了")
+        print(f"  終わったフェーズの結果は {CHECKPOINT_FOLDER} に保存されています（再実行すると続きから始めます）")
 
 if __name__ == "__main__":
     main()
@@ -10,8 +10,12 @@
 Seleniumとの違いを理解するための教材として使用してください。
 """
 
-import requests
-from bs4 import BeautifulSoup
+import os
+import sys
+
+# python/ フォルダを検索パスに追加して共通モジュールを読み込む
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import http_client, parser
 
 def scrape_dynamic_page_with_soup():
     """BeautifulSoupで動的ページをスクレイピング（失敗例）"""
@@ -21,12 +25,11 @@ def scrape_dynamic_page_with_soup():
     
     try:
         # 通常のHTTPリクエスト
-        response = requests.get(url)
-        response.raise_for_status()
+        response = http_client.fetch(url)
         print("✓ ページ取得成功")
         
         # BeautifulSoupで解析
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = parser.make_soup(response.content)
         print("✓ HTML解析完了")
         
     except Exception as e:
@@ -9,23 +9,29 @@
 - select要素とoption要素の取得
 """
 
-import requests
-from bs4 import BeautifulSoup
+import os
+import sys
+
+from bs4 import SoupStrainer
+
+# python/ フォルダを検索パスに追加して共通モジュールを読み込む
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import http_client, parser
 
 # スクレイピング対象のURL
 URL = "https://scraping-practice-six.vercel.app/form"
 
-def get_soup():
+# フォーム関連の要素（この部分だけを解析する）
+FORM_ELEMENTS = SoupStrainer(['form', 'input', 'select', 'textarea', 'label', 'button'])
+
+def get_soup(parse_only=None):
     """Webページを取得してBeautifulSoupオブジェクトを返す"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
     print("📡 Webページを取得中...")
-    response = requests.get(URL, headers=headers)
-    response.raise_for_status()
+    soup = http_client.get_soup(URL, parse_only=parse_only)
     print("✓ ページ取得成功")
-    return BeautifulSoup(response.content, 'html.parser')
+    return soup
 
+@parser.parses(FORM_ELEMENTS)
 def scrape_form_basic_info(soup):
     """フォーム要素の基本情報を取得"""
     print("1. フォーム要素の基本情報")
@@ -41,6 +47,7 @@ def scrape_form_basic_info(soup):
         print(f"  id: {form_id}")
     print()
 
+@parser.parses(FORM_ELEMENTS)
 def scrape_input_elements(soup):
     """input要素を種類別に分類して取得"""
     print("2. input要素の詳細情報")
@@ -70,6 +77,7 @@ def scrape_input_elements(soup):
             print(f"     required: {required}")
     print()
 
+@parser.parses(FORM_ELEMENTS)
 def scrape_select_elements(soup):
     """select要素とoption要素を取得"""
     print("3. select要素とoption要素")
@@ -99,6 +107,7 @@ def scrape_select_elements(soup):
             print(f"    {j}. value: {value}, text: {text}, selected: {selected}")
     print()
 
+@parser.parses(FORM_ELEMENTS)
 def scrape_textarea_elements(soup):
     """textarea要素を取得"""
     print("4. textarea要素")
@@ -122,6 +131,7 @@ def scrape_textarea_elements(soup):
         print(f"  内容: {content[:50]}..." if len(content) > 50 else f"  内容: {content}")
     print()
 
+@parser.parses(FORM_ELEMENTS)
 def scrape_label_elements(soup):
     """label要素とfor属性を取得"""
     print("5. label要素とfor属性")
@@ -147,6 +157,7 @@ def scrape_label_elements(soup):
                 print(f"  対応要素: 見つかりません")
         print()
 
+@parser.parses(FORM_ELEMENTS)
 def scrape_button_elements(soup):
     """button要素を取得"""
     print("6. button要素")
@@ -168,6 +179,7 @@ def scrape_button_elements(soup):
         print(f"  テキスト: {text}")
         print()
 
+@parser.parses(FORM_ELEMENTS)
 def scrape_form_validation_attributes(soup):
     """フォームのバリデーション属性を取得"""
     print("7. フォームのバリデーション属性")
@@ -210,8 +222,8 @@ def main():
     print("0. 終了")
     print("=" * 50)
     
-    # 一度だけWebページを取得
-    soup = get_soup()
+    # 一度だけWebページを取得（フォーム関連の要素だけを解析する）
+    soup = get_soup(parser.strainer_for([func for _, func in menu]))
     
     while True:
         try:
@@ -11,22 +11,24 @@
 - ネストしたリストの処理
 """
 
-import requests
-from bs4 import BeautifulSoup
+import os
+import sys
+
+# python/ フォルダを検索パスに追加して共通モジュールを読み込む
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import http_client
+from common.doc_index import get_index
+from common.list_tree import LIST_TAGS, build_list_tree
 
 # スクレイピング対象のURL
 URL = "https://scraping-practice-six.vercel.app/list"
 
 def get_soup():
     """Webページを取得してBeautifulSoupオブジェクトを返す"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
     print("📡 Webページを取得中...")
-    response = requests.get(URL, headers=headers)
-    response.raise_for_status()
+    soup = http_client.get_soup(URL)
     print("✓ ページ取得成功")
-    return BeautifulSoup(response.content, 'html.parser')
+    return soup
 
 def scrape_unordered_lists(soup):
     """順序なしリスト (ul) を取得"""
@@ -93,43 +95,44 @@ def scrape_ordered_lists(soup):
             print(f"    {j}. {text}")
     print()
 
-def scrape_nested_lists(soup):
+def scrape_nested_lists(soup, filename="nested_lists.json"):
     """ネストしたリストを詳細に取得"""
     print("3. ネストしたリストの詳細取得")
     print("-" * 30)
     
-    def process_list(list_element, level=0):
-        """リストを再帰的に処理する関数"""
-        indent = "  " * level
-        list_type = list_element.name  # 'ul' または 'ol'
-        
-        items = list_element.find_all('li', recursive=False)
-        print(f"{indent}{list_type}リスト ({len(items)}項目):")
-        
-        for i, li in enumerate(items, 1):
-            # 直接のテキストコンテンツを取得
-            direct_text = ''.join(li.find_all(text=True, recursive=False)).strip()
-            print(f"{indent}  {i}. {direct_text}")
-            
-            # 子リストがあるかチェック
-            child_lists = li.find_all(['ul', 'ol'], recursive=False)
-            for child_list in child_lists:
-                process_list(child_list, level + 2)
+    # 文書を1回たどって、全リストの階層を「深さ・親の番号・テキスト」の配列にする
+    # （再帰を使わないので、深いリストでも再帰の上限に達しません）
+    tree = build_list_tree(soup)
+    item_counts = tree.child_counts('li')
     
-    # トップレベルのリストを検索
-    top_lists = soup.find_all(['ul', 'ol'])
+    # 一番外側のリストのうち、中に別のリストを含むもの
     nested_lists = []
-    
-    for lst in top_lists:
-        # 子リストを含むかチェック
-        if lst.find(['ul', 'ol']):
-            nested_lists.append(lst)
+    for root in tree.roots():
+        end = tree.subtree_end(root)
+        if tree.tags[root] in LIST_TAGS and any(tag in LIST_TAGS for tag in tree.tags[root + 1:end]):
+            nested_lists.append((root, end))
     
     print(f"ネストしたリスト: {len(nested_lists)}個")
     
-    for i, lst in enumerate(nested_lists, 1):
+    for i, (root, end) in enumerate(nested_lists, 1):
         print(f"\nネストリスト{i}:")
-        process_list(lst)
+        # 部分木は配列の連続した範囲なので、順番に表示するだけで階層どおりになる
+        item_numbers = {}
+        for node in range(root, end):
+            indent = "  " * (tree.depth[node] - tree.depth[root])
+            if tree.tags[node] == 'li':
+                parent = tree.parent[node]
+                item_numbers[parent] = item_numbers.get(parent, 0) + 1
+                print(f"{indent}{item_numbers[parent]}. {tree.text[node]}")
+            else:
+                print(f"{indent}{tree.tags[node]}リスト ({item_counts[node]}項目):")
+    
+    # 階層を他のツールでも使えるようにJSONで保存
+    output_folder = "output"
+    os.makedirs(output_folder, exist_ok=True)
+    full_filename = os.path.join(output_folder, filename)
+    tree.save(full_filename)
+    print(f"\n✓ リストの階層を保存しました: {full_filename}")
     print()
 
 def scrape_definition_lists(soup):
@@ -173,21 +176,13 @@ def scrape_lists_by_class(soup):
     # クラス名でリストを検索
     classes = ['programming-languages', 'tech-categories']
     
-    for class_name in classes:
-        # 全てのul, ol要素を取得
-        all_lists = soup.find_all(['ul', 'ol'])
-        elements = []
-        
-        # 各リスト要素のクラスをチェック
-        for lst in all_lists:
-            class_attr = lst.get('class')
-            if class_attr:  # クラス属性が存在する場合
-                class_string = ' '.join(class_attr)  # リストを文字列に変換
-                if class_name in class_string:  # 指定したクラス名が含まれるかチェック
-                    elements.append(lst)
-        
+    # クラス名の索引から、指定した名前で始まるクラスを持つul, ol要素をまとめて取得
+    # （文字列の部分一致と違い 'not-programming-languages' などは含まれません）
+    results = get_index(soup).find_by_classes(classes, tags=['ul', 'ol'], prefix=True)
+    
+    for class_name, elements in results.items():
         if elements:
-            print(f"\n'{class_name}'を含むクラスのリスト: {len(elements)}個")
+            print(f"\n'{class_name}'で始まるクラスのリスト: {len(elements)}個")
             for i, element in enumerate(elements, 1):
                 element_class = ' '.join(element.get('class', []))
                 items = element.find_all('li', recursive=False)
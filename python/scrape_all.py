@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全練習ページをまとめてスクレイピングする
+basic / table / attributes / form / list の5ページを同時に取得し、
+取得できたページから順に各スクリプトの scrape_* 関数へ渡します。
+
+学習ポイント:
+- asyncioで複数のページ取得を同時に進める
+- Semaphoreで同時に取得するページ数を制限する
+- 全体の待ち時間は「合計」ではなく「一番遅いページ」程度になる
+
+実行方法（pythonフォルダで実行）:
+    python scrape_all.py
+    python scrape_all.py --concurrency 2
+"""
+
+import argparse
+import asyncio
+import time
+
+from common import http_client, parser
+from basic import scrape_basic
+from table import scrape_table
+from attributes import scrape_attributes
+from form import scrape_form
+from list import scrape_list
+
+# 既定の同時取得数
+DEFAULT_CONCURRENCY = 5
+
+# (ページ名, URL, そのページで実行する関数) の一覧
+PAGES = [
+    ("基本ページ", scrape_basic.URL, [
+        scrape_basic.scrape_main_title,
+        scrape_basic.scrape_headings,
+        scrape_basic.scrape_paragraphs,
+        scrape_basic.scrape_links,
+        scrape_basic.scrape_images,
+        scrape_basic.scrape_sections,
+        scrape_basic.scrape_white_sections,
+        scrape_basic.scrape_decorative,
+    ]),
+    ("テーブルページ", scrape_table.URL, [
+        scrape_table.scrape_product_table,
+        scrape_table.scrape_sales_table,
+        scrape_table.scrape_employee_table,
+        scrape_table.scrape_price_comparison,
+        scrape_table.scrape_product_name_price_to_csv,
+    ]),
+    ("属性ページ", scrape_attributes.URL, [
+        scrape_attributes.scrape_basic_attributes,
+        scrape_attributes.scrape_link_attributes,
+        scrape_attributes.scrape_image_attributes,
+        scrape_attributes.scrape_data_attributes,
+        scrape_attributes.scrape_form_attributes,
+        scrape_attributes.scrape_style_attributes,
+    ]),
+    ("フォームページ", scrape_form.URL, [
+        scrape_form.scrape_form_basic_info,
+        scrape_form.scrape_input_elements,
+        scrape_form.scrape_select_elements,
+        scrape_form.scrape_textarea_elements,
+        scrape_form.scrape_label_elements,
+        scrape_form.scrape_button_elements,
+        scrape_form.scrape_form_validation_attributes,
+    ]),
+    ("リストページ", scrape_list.URL, [
+        scrape_list.scrape_unordered_lists,
+        scrape_list.scrape_ordered_lists,
+        scrape_list.scrape_nested_lists,
+        scrape_list.scrape_definition_lists,
+        scrape_list.scrape_lists_by_class,
+    ]),
+]
+
+
+async def fetch_soup(url, scrapers, semaphore):
+    """同時実行数を守りながらページを取得・解析する"""
+    # 全関数が必要な部分を宣言していれば、その部分だけを解析する
+    parse_only = parser.strainer_for(scrapers)
+    async with semaphore:
+        start = time.perf_counter()
+        # requestsは同期処理なので、別スレッドで実行して待つ
+        soup = await asyncio.to_thread(http_client.get_soup, url, parse_only=parse_only)
+        return soup, time.perf_counter() - start
+
+
+async def scrape_all(pages=PAGES, concurrency=DEFAULT_CONCURRENCY):
+    """全ページを同時に取得し、ページ順にスクレイピング関数を実行する"""
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+
+    # 先に全ページの取得を開始しておく
+    tasks = [asyncio.create_task(fetch_soup(url, scrapers, semaphore))
+             for _, url, scrapers in pages]
+
+    # 表示が混ざらないように、結果はページの順番で処理する
+    for (name, url, scrapers), task in zip(pages, tasks):
+        print("\n" + "=" * 50)
+        print(f"{name} ({url})")
+        print("=" * 50)
+        try:
+            soup, elapsed = await task
+        except Exception as e:
+            print(f"✗ ページ取得失敗: {e}")
+            continue
+        print(f"✓ ページ取得成功 ({elapsed:.2f}秒)")
+        for scraper in scrapers:
+            scraper(soup)
+
+    print("\n" + "=" * 50)
+    print(f"全ページ完了: {time.perf_counter() - start:.2f}秒")
+    print("=" * 50)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="全練習ページの同時スクレイピング")
+    arg_parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                            help="同時に取得するページ数")
+    args = arg_parser.parse_args()
+    asyncio.run(scrape_all(concurrency=args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+スキーマ（JSON）に書いた内容でスクレイピングする
+新しいページでも、schemas/ にJSONを追加するだけでデータを取り出せます。
+ファイル内の全スキーマは、文書を1回たどるだけでまとめて実行されます。
+
+学習ポイント:
+- 抽出のルールをデータ（JSON）として分けておく
+- 1回の走査で複数の種類のレコードを同時に取り出す
+
+実行方法（pythonフォルダで実行）:
+    python scrape_schema.py schemas/table.json
+    python scrape_schema.py schemas/form.json schemas/list.json --save
+"""
+
+import argparse
+import os
+
+from common import http_client, schema, sinks
+
+
+def scrape_with_schema(path, save=False):
+    """スキーマファイルのページを取得し、全スキーマのレコードを表示する"""
+    data = schema.load_schema_file(path)
+    plan = schema.compile_schemas(data['schemas'])
+    soup = http_client.get_soup(data['url'])
+    results = plan.run(soup)
+
+    for name, records in results.items():
+        print(f"\n■ {name}: {len(records)}件")
+        for i, record in enumerate(records, 1):
+            print(f"  {i}. {record}")
+
+    if save:
+        save_results(path, results)
+    return results
+
+
+def save_results(path, results):
+    """結果をoutput/schema_<ファイル名>.jsonlに1行1レコードで保存する"""
+    output_folder = "output"
+    name = os.path.splitext(os.path.basename(path))[0]
+    # スキーマごとに項目が違うので、CSVではなくJSON Linesで保存する
+    full_filename = os.path.join(output_folder, f"schema_{name}.jsonl")
+    with sinks.open_sink(full_filename) as sink:
+        for schema_name, records in results.items():
+            sink.write_many({'スキーマ': schema_name, **record} for record in records)
+    print(f"\n✓ 保存しました: {full_filename}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="スキーマ（JSON）によるスクレイピング")
+    arg_parser.add_argument('schema_files', nargs='+', help="スキーマのJSONファイル")
+    arg_parser.add_argument('--save', action='store_true', help="結果をJSONで保存する")
+    args = arg_parser.parse_args()
+    for path in args.schema_files:
+        print("=" * 50)
+        print(path)
+        print("=" * 50)
+        try:
+            scrape_with_schema(path, save=args.save)
+        except Exception as e:
+            print(f"✗ 失敗しました: {e}")
+
+
+if __name__ == "__main__":
+    main()
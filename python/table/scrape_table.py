@@ -1,18 +1,50 @@
-import requests
-from bs4 import BeautifulSoup
-import csv
+import argparse
+import itertools
 import os
+import sys
+
+from bs4 import SoupStrainer
+
+# python/ フォルダを検索パスに追加して共通モジュールを読み込む
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import columnar, delta, http_client, pagination, parser, sinks, table_stream
+from common.selector import select, select_one
 
 URL = "https://scraping-practice-six.vercel.app/table"
 
-def get_soup():
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
-    response = requests.get(URL, headers=headers)
-    response.raise_for_status()
-    return BeautifulSoup(response.content, 'html.parser')
+# 各関数が必要とするテーブル（この部分だけを解析する）
+PRODUCT_TABLE = SoupStrainer('table', id='product-table')
+SALES_TABLE = SoupStrainer('table', id='sales-table')
+EMPLOYEE_TABLE = SoupStrainer('table', id='employee-table')
+PRICE_COMPARISON_TABLE = SoupStrainer('div', class_=parser.has_class('price-comparison-table'))
+# 次のページへのリンクがありそうな部分
+PAGE_LINKS = SoupStrainer(['a', 'link', 'nav'])
+PAGINATION = SoupStrainer(class_=parser.has_class('pagination'))
+
+# ストリーミングで読むテーブル: {テーブルid: (見出し, セルとして読むタグ)}
+STREAM_TABLES = {
+    'product-table': ("■ 商品テーブル", ('td',)),
+    'sales-table': ("■ 売上テーブル", ('td',)),
+    'employee-table': ("■ 従業員テーブル", ('td', 'th')),
+}
+
+# 列形式で読むテーブル: {テーブルid: 見出し}
+COLUMNAR_TABLES = {
+    'product-table': "■ 商品テーブル（列形式）",
+    'sales-table': "■ 売上テーブル（列形式）",
+}
 
+# 差分を出力するテーブル: {テーブルid: (見出し, 出力名, IDの列番号)}
+# IDの列番号がNoneのテーブルは、行の内容そのものをIDにする（追加と削除だけを出力）
+DELTA_TABLES = {
+    'product-table': ("■ 商品テーブル（差分）", "products", 0),
+    'sales-table': ("■ 売上テーブル（差分）", "sales", None),
+}
+
+def get_soup(parse_only=None):
+    return http_client.get_soup(URL, parse_only=parse_only)
+
+@parser.parses(PRODUCT_TABLE)
 def scrape_product_table(soup):
     print("■ 商品テーブル")
     table = soup.find('table', id='product-table')
@@ -22,6 +54,7 @@ def scrape_product_table(soup):
         data = [cell.get_text(strip=True) for cell in cells]
         print(data)
 
+@parser.parses(SALES_TABLE)
 def scrape_sales_table(soup):
     print("\n■ 売上テーブル")
     table = soup.find('table', id='sales-table')
@@ -31,6 +64,7 @@ def scrape_sales_table(soup):
         data = [cell.get_text(strip=True) for cell in cells]
         print(data)
 
+@parser.parses(EMPLOYEE_TABLE)
 def scrape_employee_table(soup):
     print("\n■ 従業員テーブル")
     table = soup.find('table', id='employee-table')
@@ -40,16 +74,18 @@ def scrape_employee_table(soup):
         data = [cell.get_text(strip=True) for cell in cells]
         print(data)
 
+@parser.parses(PRICE_COMPARISON_TABLE)
 def scrape_price_comparison(soup):
     print("\n■ 価格比較（divテーブル形式）")
-    table = soup.find('div', class_='price-comparison-table')
-    rows = table.find_all('div', class_='table-row')
+    table = select_one(soup, 'div.price-comparison-table')
+    rows = select(table, 'div.table-row')
     for row in rows:
-        cols = row.find_all('div')
+        cols = select(row, 'div')
         data = [col.get_text(strip=True) for col in cols]
         print(data)
 
-def scrape_product_name_price_to_csv(soup, filename="product_name_price.csv"):
+@parser.parses(PRODUCT_TABLE)
+def scrape_product_name_price_to_csv(soup, filename=None):
     """商品テーブルから商品名と価格を抽出してCSVに保存する"""
     
     # output フォルダを作成
@@ -59,41 +95,267 @@ def scrape_product_name_price_to_csv(soup, filename="product_name_price.csv"):
         print(f"✓ フォルダ作成: {output_folder}")
     
     # ファイルパスをoutput配下に設定
-    full_filename = os.path.join(output_folder, filename)
+    full_filename = os.path.join(output_folder, filename) if filename else \
+        sinks.output_path(output_folder, "product_name_price")
     # full_filenameはoutput/product_name_price.csv になります
+    # （SCRAPE_OUTPUT_FORMAT=jsonl なら output/product_name_price.jsonl）
 
-    table = soup.find('table', id='product-table')
+    table = select_one(soup, 'table#product-table')
     if not table:
         print("商品テーブルが見つかりません")
         return
-    rows = table.find_all('tr')[1:]  # ヘッダー除く
-    data_list = []
-    for row in rows:
-        name_cell = row.find('td', class_='product-name')
-        price_cell = row.find('td', class_='price')
-        if name_cell and price_cell:
-            name = name_cell.get_text(strip=True)
-            price = price_cell.get_text(strip=True)
-            data_list.append([name, price])
-    if not data_list:
-        print("商品名と価格のデータが見つかりませんでした")
-        return
+    rows = select(table, 'tr')[1:]  # ヘッダー除く
+    sink = None
     try:
-        with open(full_filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(["商品名", "価格"])
-            writer.writerows(data_list)
-        print(f"商品名と価格をCSVに保存しました: {full_filename}")
+        # 見つけた行から順に書き出す（リストにためない）
+        for row in rows:
+            # セレクターは最初の1回だけコンパイルされ、2行目以降は使い回される
+            name_cell = select_one(row, 'td.product-name')
+            price_cell = select_one(row, 'td.price')
+            if name_cell and price_cell:
+                name = name_cell.get_text(strip=True)
+                price = price_cell.get_text(strip=True)
+                if sink is None:
+                    # データが見つかってから開く（見つからなければ前のファイルを消さない）
+                    # SQLiteに保存する場合は、商品名が同じ行を更新する
+                    sink = sinks.open_sink(full_filename, ["商品名", "価格"], key="商品名")
+                sink.write([name, price])
     except Exception as e:
         print(f"CSV保存に失敗しました: {e}")
+        return
+    finally:
+        if sink is not None:
+            sink.close()
+    if sink is None:
+        print("商品名と価格のデータが見つかりませんでした")
+        return
+    print(f"商品名と価格を保存しました: {full_filename}")
+
+def scrape_tables_streaming():
+    """ページ全体を解析せず、ダウンロードしながら届いた行から順に表示する"""
+    tables = {table_id: cell_tags for table_id, (_, cell_tags) in STREAM_TABLES.items()}
+    current = None
+    for table_id, data in table_stream.stream_table_rows(URL, tables):
+        if table_id != current:
+            title = STREAM_TABLES[table_id][0]
+            print(title if current is None else "\n" + title)
+            current = table_id
+        print(data)
+
+def scrape_tables_columnar():
+    """商品・売上テーブルを型付きの列に変換し、列ごとの集計を表示する"""
+    # ヘッダー行を列名として使うので、ヘッダーも含めて1行ずつ読む
+    tables = {}
+    rows = table_stream.stream_table_rows(
+        URL, {table_id: ('td', 'th') for table_id in COLUMNAR_TABLES}, skip_header=False)
+    for table_id, data in rows:
+        if table_id not in tables:
+            tables[table_id] = columnar.ColumnTable(data)
+        else:
+            tables[table_id].append(data)
+
+    for table_id, title in COLUMNAR_TABLES.items():
+        print(title if table_id == 'product-table' else "\n" + title)
+        table = tables.get(table_id)
+        if table is None:
+            print("テーブルが見つかりません")
+            continue
+        print_column_summary(table)
+        if table_id == 'sales-table':
+            print_group_summary(table)
+
+def print_column_summary(table):
+    """列ごとの型と最小・最大（数値なら合計も）を表示する"""
+    print(f"行数: {table.row_count}")
+    for name, column in zip(table.names, table.columns):
+        if column is None:
+            continue
+        line = f"  {name}: {column.kind}  最小={column.min()}  最大={column.max()}"
+        if isinstance(column, columnar.NumberColumn):
+            line += f"  合計={table.sum(name)}"
+        elif isinstance(column, columnar.StringColumn):
+            line += f"  種類={len(column.dictionary)}"
+        print(line)
+
+def print_group_summary(table):
+    """最初の文字列の列ごとに、数値の列を合計して表示する"""
+    kinds = dict(zip(table.names, table.columns))
+    keys = [name for name, column in kinds.items() if isinstance(column, columnar.StringColumn)]
+    values = [name for name, column in kinds.items() if isinstance(column, columnar.NumberColumn)]
+    if not keys or not values:
+        return
+    key = keys[0]
+    counts = table.group_count(key)
+    totals = {name: table.group_sum(key, name) for name in values}
+    print(f"● {key}ごとの集計")
+    for group, count in counts.items():
+        sums = "  ".join(f"{name}={totals[name][group]}" for name in values)
+        print(f"  {group}: {count}件  {sums}")
+
+def scrape_tables_delta():
+    """商品・売上テーブルのうち、前回の実行から追加・更新・削除された行だけを出力する"""
+    output_folder = "output"
+    rows = table_stream.stream_table_rows(
+        URL, {table_id: ('td', 'th') for table_id in DELTA_TABLES}, skip_header=False)
+    with delta.open_change_log() as change_log:
+        # 同じテーブルの行は続けて届くので、テーブルごとにまとめて処理する
+        for table_id, table_rows in itertools.groupby(rows, key=lambda item: item[0]):
+            title, name, key_index = DELTA_TABLES[table_id]
+            header = next(table_rows)[1]
+            first = next(table_rows, None)
+            if first is None:
+                # 取得に失敗して0行のときに「全行削除」と判定しないよう、前回の状態は残す
+                print(title)
+                print("  ⚠ データの行がないため、比較しませんでした")
+                continue
+            records = (dict(zip(header, cells))
+                       for _, cells in itertools.chain([first], table_rows))
+            key = header[key_index] if key_index is not None else None
+            tracker = delta.DeltaTracker(name, key=key)
+            full_filename = sinks.output_path(output_folder, f"{name}_delta")
+            fieldnames = ["変更"] + header + (["ハッシュ"] if key is None else [])
+            with sinks.open_sink(full_filename, fieldnames) as sink:
+                counts = delta.write_changes(tracker, records, sink, change_log)
+            print(title)
+            print("  " + " / ".join(f"{change}: {count}件" for change, count in counts.items())
+                  + f" → {full_filename}")
+    print(f"変更ログに追記しました: {delta.CHANGE_LOG}")
+
+def read_product_page(url):
+    """1ページを取得し、商品テーブルのヘッダー・行と次のページのURLを返す"""
+    soup = http_client.get_soup(
+        url, parse_only=parser.StrainerUnion([PRODUCT_TABLE, PAGE_LINKS, PAGINATION]))
+    table = select_one(soup, 'table#product-table')
+    rows = []
+    if table:
+        rows = [[cell.get_text(strip=True) for cell in select(row, 'td, th')]
+                for row in select(table, 'tr')]
+    return {
+        'header': rows[0] if rows else [],
+        'rows': rows[1:],  # ヘッダー除く
+        'next': pagination.find_next_url(soup, url),
+    }
+
+def iter_product_pages(pattern=None, max_pages=None, window=pagination.DEFAULT_WINDOW):
+    """
+    商品テーブルのページを順に (ページ番号, URL, 内容, 例外) で返す
+
+    pattern: '...?page={page}' の形のURL。Noneなら最初のページの「次へ」リンクから探す
+    """
+    if pattern is None:
+        page = 1
+        url = URL
+        visited = set()
+        while url and url not in visited and (max_pages is None or page <= max_pages):
+            visited.add(url)
+            try:
+                content = read_product_page(url)
+            except Exception as e:
+                yield page, url, None, e
+                return
+            yield page, url, content, None
+            # 次のURLにページ番号があれば、残りは番号から作って同時に取得する
+            guessed = pagination.guess_page_pattern(content['next']) if content['next'] else None
+            if guessed and guessed[1] == page + 1:
+                pattern = guessed[0]
+                break
+            url = content['next']
+            page += 1
+        else:
+            return
+        page += 1
+    else:
+        page = 1
+
+    urls = pagination.page_urls(pattern, start=page, end=max_pages)
+    for number, (url, content, error) in enumerate(
+            pagination.map_in_order(read_product_page, urls, window), page):
+        yield number, url, content, error
+        # 取得できないページや空のページまで来たら最後のページを過ぎている
+        if error is not None or not content['rows']:
+            return
+
+def scrape_product_pages(pattern=None, max_pages=None, window=pagination.DEFAULT_WINDOW,
+                         filename=None):
+    """複数ページの商品テーブルを同時に取得し、ページ順にCSVへ書き出す"""
+    print("■ 商品テーブル（複数ページ）")
+    output_folder = "output"
+    full_filename = os.path.join(output_folder, filename) if filename else \
+        sinks.output_path(output_folder, "product_pages")
+
+    # 同時取得数が接続プールの大きさを超えないようにする
+    http_client.ensure_host_pool_size(URL, window)
+
+    sink = None
+    try:
+        for number, url, content, error in iter_product_pages(pattern, max_pages, window):
+            if error is not None:
+                # 途中まで読めていれば、最後のページを過ぎたと考えて終了する
+                mark = "⚠" if sink and sink.count else "✗"
+                print(f"  {mark} ページ{number}: 取得できませんでした ({error})")
+                continue
+            if not content['rows']:
+                print(f"  ⚠ ページ{number}: 商品テーブルの行がありません")
+                continue
+            if sink is None:
+                # 列名は最初のページのヘッダーから決める
+                # （SQLiteに保存する場合は、先頭の列（商品名）が同じ行を更新する）
+                header = ["ページ"] + content['header']
+                sink = sinks.open_sink(full_filename, header, key=header[1:2] or None)
+            # ページごとに書き出して、行を手元にためない
+            sink.write_many([number] + row for row in content['rows'])
+            sink.flush()
+            print(f"  ✓ ページ{number}: {len(content['rows'])}行 ({url})")
+    finally:
+        if sink is not None:
+            sink.close()
+    if sink is None:
+        print("商品テーブルの行が見つかりませんでした")
+        return
+    print(f"{sink.count}行を保存しました: {full_filename}")
 
 def main():
-    soup = get_soup()
-    scrape_product_table(soup)
-    scrape_sales_table(soup)
-    scrape_employee_table(soup)
-    scrape_price_comparison(soup)
-    scrape_product_name_price_to_csv(soup)
+    # 巨大なテーブルは --stream を付けると一定のメモリで読めます
+    # 例: python table/scrape_table.py --stream
+    arg_parser = argparse.ArgumentParser(description="テーブルのスクレイピング")
+    arg_parser.add_argument('--stream', action='store_true',
+                            help="ツリーを作らずに商品・売上・従業員テーブルを1行ずつ読む")
+    arg_parser.add_argument('--columnar', action='store_true',
+                            help="商品・売上テーブルを型付きの列に変換して集計する")
+    arg_parser.add_argument('--pages', action='store_true',
+                            help="複数ページの商品テーブルを巡回してCSVに保存する")
+    arg_parser.add_argument('--page-pattern',
+                            help="ページのURLのパターン（例: '.../table?page={page}'）")
+    arg_parser.add_argument('--max-pages', type=int, help="読むページ数の上限")
+    arg_parser.add_argument('--window', type=int, default=pagination.DEFAULT_WINDOW,
+                            help="同時に取得するページ数")
+    arg_parser.add_argument('--delta', action='store_true',
+                            help="前回の実行から変わった商品・売上の行だけを出力する")
+    args = arg_parser.parse_args()
+    if args.delta:
+        scrape_tables_delta()
+        return
+    if args.pages or args.page_pattern:
+        scrape_product_pages(args.page_pattern, args.max_pages, args.window)
+        return
+    if args.columnar:
+        scrape_tables_columnar()
+        return
+    if args.stream:
+        scrape_tables_streaming()
+        return
+
+    scrapers = [
+        scrape_product_table,
+        scrape_sales_table,
+        scrape_employee_table,
+        scrape_price_comparison,
+        scrape_product_name_price_to_csv,
+    ]
+    # 使うテーブルだけを解析する
+    soup = get_soup(parser.strainer_for(scrapers))
+    for scraper in scrapers:
+        scraper(soup)
 
 if __name__ == "__main__":
     main()
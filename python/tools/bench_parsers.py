@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+パーサーごとの解析時間の計測
+全ページのHTMLを使えるパーサーごとに解析し、html.parser と比べた速さを表示します。
+関数が必要な部分を宣言しているページは部分解析（SoupStrainer）の時間も表示します。
+
+実行方法（pythonフォルダで実行）:
+    python tools/bench_parsers.py
+    SCRAPE_MODE=replay python tools/bench_parsers.py --repeat 50
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+# python/ フォルダを検索パスに追加して共通モジュールを読み込む
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import http_client, parser
+from scrape_all import PAGES
+
+# 速さの基準にするパーサー
+BASELINE_PARSER = 'html.parser'
+
+# 既定の計測回数
+DEFAULT_REPEAT = 20
+
+
+def measure(markup, parser_name, repeat, parse_only=None):
+    """解析を繰り返し、一番速かった時間（秒）を返す"""
+    return min(timeit.repeat(lambda: parser.make_soup(markup, parser_name, parse_only=parse_only),
+                             number=1, repeat=repeat))
+
+
+def print_result(label, elapsed, baseline):
+    """解析時間と html.parser に対する速さを表示する"""
+    speedup = baseline / elapsed if elapsed > 0 else 0
+    print(f"  {label:<20} {elapsed * 1000:8.2f} ms  (×{speedup:.2f})")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="パーサーの解析時間の計測")
+    arg_parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                            help="1ページあたりの計測回数")
+    args = arg_parser.parse_args()
+
+    parsers = parser.available_parsers()
+    print("⏱ パーサーの解析時間")
+    print(f"計測回数: {args.repeat}回（最速値を表示）")
+    print("=" * 50)
+
+    for name, url, scrapers in PAGES:
+        markup = http_client.fetch_page(url).content
+        print(f"\n{name} ({len(markup):,} bytes)")
+        baseline = measure(markup, BASELINE_PARSER, args.repeat)
+        parse_only = parser.strainer_for(scrapers)
+        for parser_name in parsers:
+            elapsed = baseline if parser_name == BASELINE_PARSER else measure(markup, parser_name, args.repeat)
+            print_result(parser_name, elapsed, baseline)
+            if parse_only is not None and parser_name != parser.STRICT_PARSER:
+                elapsed = measure(markup, parser_name, args.repeat, parse_only)
+                print_result(f"{parser_name}（部分解析）", elapsed, baseline)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+パーサーごとの結果比較（パリティチェック）
+全ページの scrape_* 関数を使えるパーサーごとに実行し、
+html.parser で文書全体を解析したときと同じ結果になるかを確認します。
+関数が必要な部分を宣言しているページは部分解析（SoupStrainer）でも確認します。
+class属性に別のクラスを足したページ（class="a" → class="a parity-extra"）でも同じように確認します。
+
+実行方法（pythonフォルダで実行）:
+    python tools/check_parser_parity.py
+
+ネットワークなしで確認する場合は、先にレスポンスを記録しておきます:
+    SCRAPE_MODE=record python scrape_all.py
+    SCRAPE_MODE=replay python tools/check_parser_parity.py
+"""
+
+import contextlib
+import difflib
+import io
+import os
+import re
+import sys
+
+# python/ フォルダを検索パスに追加して共通モジュールを読み込む
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import http_client, parser
+from scrape_all import PAGES
+
+# 比較の基準にするパーサー
+BASELINE_PARSER = 'html.parser'
+
+# クラスが複数あっても部分解析で見つかるかを確かめるために足すクラス
+EXTRA_CLASS = 'parity-extra'
+
+_CLASS_ATTR = re.compile(rb'class=(["\'])(.*?)\1', re.DOTALL)
+
+
+def with_extra_class(markup):
+    """すべてのclass属性の末尾に EXTRA_CLASS を足したHTMLを返す"""
+    return _CLASS_ATTR.sub(
+        lambda m: b'class=' + m.group(1) + m.group(2) + b' ' + EXTRA_CLASS.encode() + m.group(1),
+        markup)
+
+
+def run_scrapers(markup, scrapers, parser_name, parse_only=None):
+    """指定したパーサーで解析し、scrape_* 関数の出力をまとめて返す"""
+    soup = parser.make_soup(markup, parser_name, parse_only=parse_only)
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        for scraper in scrapers:
+            scraper(soup)
+    return buffer.getvalue()
+
+
+def main():
+    parsers = parser.available_parsers()
+    print("🔍 パーサーのパリティチェック")
+    print(f"基準: {BASELINE_PARSER}（文書全体） / 比較: {', '.join(parsers)}")
+    print("=" * 50)
+
+    # 「フォルダ作成」の表示で差が出ないよう、先に作っておく
+    os.makedirs("output", exist_ok=True)
+
+    mismatches = 0
+    for name, url, scrapers in PAGES:
+        original = http_client.fetch_page(url).content
+        parse_only = parser.strainer_for(scrapers)
+        for variant, markup in (('', original), ('・クラス追加', with_extra_class(original))):
+            expected = run_scrapers(markup, scrapers, BASELINE_PARSER)
+            for parser_name in parsers:
+                if parser_name == BASELINE_PARSER and parse_only is None:
+                    continue
+                # html5libは部分解析に対応していないので文書全体で比較される
+                partial = parse_only is not None and parser_name != parser.STRICT_PARSER
+                label = f"{parser_name}（{'部分解析' if partial else '全体'}{variant}）"
+                try:
+                    actual = run_scrapers(markup, scrapers, parser_name, parse_only)
+                except Exception as e:
+                    actual = f"例外: {type(e).__name__}: {e}"
+                if actual == expected:
+                    print(f"✓ {name}: {label}")
+                    continue
+                mismatches += 1
+                print(f"✗ {name}: {label} の結果が異なります")
+                diff = difflib.unified_diff(expected.splitlines(), actual.splitlines(),
+                                            BASELINE_PARSER, label, lineterm='')
+                for line in list(diff)[:20]:
+                    print(f"    {line}")
+
+    print("=" * 50)
+    if mismatches:
+        print(f"✗ 不一致: {mismatches}件")
+        sys.exit(1)
+    print("✓ すべてのパーサーで同じ結果になりました")
+
+
+if __name__ == "__main__":
+    main()